@@ -1,9 +1,29 @@
 import streamlit as st
-import joblib
 import json
+import logging
+import os
+import time
 import pandas as pd
 import numpy as np
-from huggingface_hub import hf_hub_download
+import altair as alt
+from scoring import BEST_FEATURES, DATA_PATH, predict, prepare_features, score_frame
+from prediction_cache import PredictionCache
+from sensitivity import sensitivity_sweep
+from counterfactual import recommend_changes
+from drift import DriftMonitor
+from audit_log import AuditLog
+from parallel_scoring import ParallelScorer
+from rollups import WorkforceRollup
+import metrics
+from model_runtime import get_runtime
+from model_store import HF_REPO_ID, MODEL_STORE_DIR
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+# Metrics endpoint, log line and model warm-up start once per process; each rerun is timed
+metrics.start_exporter()
+get_runtime(MODEL_STORE_DIR)
+rerun_timer = metrics.start_timer("rerun")
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -18,6 +38,7 @@ st.set_page_config(
 # ============================================================================
 # CUSTOM CSS STYLING
 # ============================================================================
+css_timer = metrics.start_timer("render_css")
 st.markdown("""
 <style>
     /* Center the main content with max-width */
@@ -343,39 +364,90 @@ st.markdown("""
     }
 </style>
 """, unsafe_allow_html=True)
+css_timer.stop()
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
-HF_REPO_ID = "IamPradeep/Employee-Churn-Predictor"
-MODEL_FILENAME = "final_random_forest_model.joblib"
-
-# Define the 5 selected features (in exact order)
-BEST_FEATURES = [
-    "satisfaction_level",
-    "time_spend_company", 
-    "average_monthly_hours",
-    "number_project",
-    "last_evaluation"
-]
+# Probability of leaving above which an employee is flagged as LEAVE
+DECISION_THRESHOLD = 0.5
+
+# Serve single-employee predictions from the array-backed forest engine
+# (the ONNX session on the onnx backend)
+USE_COMPILED_FOREST = True
+
+# Uploads with at least this many rows are scored across all cores
+PARALLEL_SCORING_ROWS = 200_000
+
+# Workforce export rolled up on the organization dashboard
+WORKFORCE_PATH = os.environ.get("CHURN_WORKFORCE_PATH", DATA_PATH)
+
+# Live mode waits this long after an input change; a newer change in the
+# meantime reruns the script and abandons the stale prediction
+LIVE_DEBOUNCE_SECONDS = 0.25
+
+# Display names for the model features
+FEATURE_LABELS = {
+    "satisfaction_level": "Satisfaction Level",
+    "time_spend_company": "Years at Company",
+    "average_monthly_hours": "Avg. Monthly Hours",
+    "number_project": "Number of Projects",
+    "last_evaluation": "Last Evaluation"
+}
 
 # ============================================================================
-# LOAD MODEL FROM HUGGING FACE
+# LOAD MODEL (LOCAL STORE OR HUGGING FACE)
 # ============================================================================
+def get_active_model():
+    """The warmed-up model, waiting for the background load on a cold start
+
+    The model is loaded, compiled and warmed on a background thread started
+    when the process starts (see ``launch.py``) or on the first rerun, and
+    replaced there when a new version is published to the local store.
+    Returns None when loading failed.
+    """
+    runtime = get_runtime(MODEL_STORE_DIR)
+    if not runtime.ready:
+        with st.spinner("Warming up the model..."):
+            runtime.wait()
+    if runtime.error is not None:
+        st.error(f"❌ Error loading model: {str(runtime.error)}")
+    return runtime.active
+
+@st.cache_resource(max_entries=1)
+def get_parallel_scorer(version, _engine, engine_path=None):
+    """Process pool whose workers share one memory-mapped copy of the engine
+
+    Keyed by model version so a hot-swapped model gets a fresh pool. The
+    store's engine file is mapped directly when there is one.
+    """
+    return ParallelScorer(_engine, engine_path=engine_path)
+
+@st.cache_resource(max_entries=1)
+def get_workforce_rollup(version, _model):
+    """Process-wide department and salary rollups, rebuilt only for a new model version"""
+    return WorkforceRollup(_model, DECISION_THRESHOLD)
+
 @st.cache_resource
-def load_model_from_huggingface():
-    """Load the trained model from Hugging Face Hub"""
-    try:
-        model_path = hf_hub_download(
-            repo_id=HF_REPO_ID,
-            filename=MODEL_FILENAME,
-            repo_type="model"
-        )
-        model = joblib.load(model_path)
-        return model
-    except Exception as e:
-        st.error(f"❌ Error loading model: {str(e)}")
-        return None
+def get_drift_monitor():
+    """Process-wide live input histograms compared with the training data"""
+    monitor = DriftMonitor.from_reference()
+    metrics.add_collector("drift", monitor.stats)
+    return monitor
+
+@st.cache_resource
+def get_audit_log():
+    """Process-wide audit trail of every prediction, written in the background"""
+    audit_log = AuditLog()
+    metrics.add_collector("audit", audit_log.stats)
+    return audit_log
+
+@st.cache_resource
+def get_prediction_cache():
+    """Process-wide LRU cache of predictions shared by all sessions"""
+    cache = PredictionCache()
+    metrics.add_collector("prediction_cache", cache.stats)
+    return cache
 
 # ============================================================================
 # CALLBACK FUNCTIONS FOR SYNCING SLIDERS AND NUMBER INPUTS
@@ -396,6 +468,263 @@ def sync_evaluation_input():
     """Sync evaluation from number input to session state"""
     st.session_state.last_evaluation = st.session_state.eval_input
 
+# ============================================================================
+# LIVE PREDICTION
+# ============================================================================
+def debounce_live_inputs(input_data):
+    """Pause a live rerun whose inputs changed; return whether they changed"""
+    # A newer widget change stops this run at its next element call, so a burst
+    # of edits ends in one forest call and results render. Every rerun still
+    # re-emits the CSS and rebuilds the input widgets; the debounce does not
+    # avoid that cost.
+    inputs = tuple(input_data[feature] for feature in BEST_FEATURES)
+    if st.session_state.get("live_inputs") == inputs:
+        return False
+    st.session_state.live_inputs = inputs
+    time.sleep(LIVE_DEBOUNCE_SECONDS)
+    return True
+
+# ============================================================================
+# BULK CSV SCORING
+# ============================================================================
+def render_batch_mode(active, cache, monitor, audit_log):
+    """Score an uploaded HRIS export in vectorized chunks"""
+    st.markdown("---")
+    st.markdown('<h2 class="section-header">📂 Score an Employee Export</h2>', unsafe_allow_html=True)
+    
+    uploaded_file = st.file_uploader(
+        "Upload a CSV shaped like HR_comma_sep.csv",
+        type="csv",
+        help="Must contain the columns: " + ", ".join(BEST_FEATURES)
+    )
+    if uploaded_file is None:
+        return
+    
+    try:
+        employees = pd.read_csv(uploaded_file)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+        st.error(f"❌ Could not read the uploaded CSV: {str(e)}")
+        return
+    
+    include_contributions = st.checkbox(
+        "Include per-feature contributions",
+        help="Adds one column per feature showing how much it moved the probability of leaving"
+    )
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        score_button = st.button("🔮 Score Workforce", use_container_width=True)
+    
+    if not score_button:
+        return
+    
+    try:
+        with metrics.timed("batch_score"):
+            # The worker pool runs the compiled engine; onnxruntime already uses every core
+            if len(employees) >= PARALLEL_SCORING_ROWS and (os.cpu_count() or 1) > 1 and active.backend != "onnx":
+                results, elapsed = score_frame(
+                    get_parallel_scorer(active.version, active.engine, active.info.get("engine_path")), employees,
+                    chunk_size=len(employees), threshold=DECISION_THRESHOLD
+                )
+            else:
+                results, elapsed = score_frame(active.model, employees, threshold=DECISION_THRESHOLD, cache=cache)
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
+        return
+    metrics.inc("predictions_total", len(results))
+    with metrics.timed("drift_update"):
+        monitor.update(employees)
+    audit_log.record(employees, results["probability_leave"], results["prediction"], active.version, "bulk")
+    
+    rows_per_sec = len(results) / elapsed if elapsed > 0 else float("inf")
+    
+    if include_contributions:
+        with metrics.timed("batch_explain"):
+            _, contributions = active.explainer.explain(prepare_features(employees))
+        results = results.join(contributions.add_prefix("contribution_").reset_index(drop=True))
+    
+    st.markdown("---")
+    st.subheader("🎯 Bulk Scoring Results")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Employees Scored", f"{len(results):,}")
+    col2.metric("Predicted Leavers", f"{int(results['prediction'].sum()):,}")
+    col3.metric("Throughput", f"{rows_per_sec:,.0f} rows/sec")
+    col4.metric("Cache Hit Rate", f"{cache.hit_rate:.1%}")
+    
+    st.dataframe(results.head(100), use_container_width=True)
+    st.download_button(
+        "⬇️ Download Predictions",
+        data=results.to_csv(index=False).encode("utf-8"),
+        file_name="employee_turnover_predictions.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+    render_drift(monitor)
+
+def render_drift(monitor):
+    """PSI and KS of every feature for all inputs scored by this server so far"""
+    report = monitor.report()
+    if not report["rows"]:
+        return
+    with st.expander("📉 Input Drift vs Training Data"):
+        st.caption(
+            f"{report['rows']:,} rows scored since startup. "
+            "PSI below 0.1 is stable, 0.1-0.25 a moderate shift and above 0.25 a major shift."
+        )
+        st.dataframe(
+            pd.DataFrame.from_dict(report["features"], orient="index").rename(
+                index=FEATURE_LABELS, columns={"psi": "PSI", "ks": "KS", "status": "Status"}
+            ),
+            use_container_width=True
+        )
+
+# ============================================================================
+# ORGANIZATION DASHBOARD
+# ============================================================================
+def render_organization(active, audit_log):
+    """Expected leavers and risk distribution per department and salary band
+
+    The rollup is shared by all sessions; opening the dashboard re-reads the
+    workforce export only if it changed and re-scores only employees whose
+    records differ from the last sync.
+    """
+    st.markdown("---")
+    st.markdown('<h2 class="section-header">🏢 Organization Overview</h2>', unsafe_allow_html=True)
+    
+    rollup = get_workforce_rollup(active.version, active.model)
+    try:
+        with metrics.timed("rollup_sync"):
+            changes = rollup.sync_csv(WORKFORCE_PATH)
+    except (OSError, ValueError) as e:
+        st.error(f"❌ Could not load the workforce from {WORKFORCE_PATH}: {str(e)}")
+        return
+    metrics.inc("predictions_total", changes["scored"])
+    rescored = changes["rows"]
+    if len(rescored):
+        audit_log.record(rescored[BEST_FEATURES], rescored["probability_leave"], rescored["prediction"],
+                         active.version, "organization")
+    totals = rollup.totals()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Employees", f"{totals['employees']:,}")
+    col2.metric("Expected Leavers", f"{totals['expected_leavers']:,.0f}")
+    col3.metric("Predicted Leavers", f"{totals['predicted_leavers']:,}")
+    col4.metric("Mean Risk", f"{totals['mean_risk']:.1%}")
+    
+    for dimension, title in [("Department", "By Department"), ("salary", "By Salary Band")]:
+        table = rollup.table(dimension)
+        st.markdown(f"### {title}")
+        chart = alt.Chart(table.reset_index()).mark_bar(color="#dc3545").encode(
+            x=alt.X("expected_leavers:Q", title="Expected Leavers"),
+            y=alt.Y(f"{dimension}:N", title=None, sort="-x"),
+            tooltip=[dimension, "employees", alt.Tooltip("mean_risk:Q", format=".1%")]
+        )
+        st.altair_chart(chart, use_container_width=True)
+        st.dataframe(
+            table.style.format({
+                "expected_leavers": "{:,.1f}", "mean_risk": "{:.1%}", "p50_risk": "{:.1%}",
+                "p75_risk": "{:.1%}", "p90_risk": "{:.1%}"
+            }),
+            use_container_width=True
+        )
+    st.caption(
+        f"Expected leavers sum each employee's probability of leaving. "
+        f"{changes['scored']:,} employees re-scored on this refresh."
+    )
+
+# ============================================================================
+# FEATURE ATTRIBUTIONS
+# ============================================================================
+def render_explanation(explainer, input_df):
+    """Show how much each input pushed the probability of leaving up or down"""
+    with metrics.timed("explain"):
+        bias, contributions = explainer.explain(input_df)
+    explanation = pd.DataFrame({
+        "feature": [FEATURE_LABELS[feature] for feature in contributions.columns],
+        "contribution": contributions.iloc[0].values * 100
+    })
+    
+    st.markdown("### 🔍 Why This Prediction?")
+    chart = alt.Chart(explanation).mark_bar().encode(
+        x=alt.X("contribution:Q", title="Change in Probability of Leaving (percentage points)"),
+        y=alt.Y("feature:N", title=None, sort=alt.EncodingSortField("contribution", op="sum", order="descending")),
+        color=alt.condition(alt.datum.contribution > 0, alt.value("#dc3545"), alt.value("#28a745"))
+    )
+    st.altair_chart(chart, use_container_width=True)
+    st.caption(f"Starting from the model's baseline of {bias * 100:.1f}%, each bar shows how far that input moved the prediction along the forest's decision paths.")
+
+# ============================================================================
+# RETENTION SUGGESTIONS
+# ============================================================================
+def render_retention_suggestions(engine, input_data):
+    """The smallest input changes that would turn a LEAVE prediction into STAY"""
+    with metrics.timed("counterfactual_search"):
+        suggestions, search = recommend_changes(engine, input_data, DECISION_THRESHOLD)
+    
+    st.markdown("### 💡 What Would Keep This Employee?")
+    if suggestions.empty:
+        st.info("No change to satisfaction, workload, projects or evaluation within the input ranges flips this prediction.")
+        return
+    for _, suggestion in suggestions.iterrows():
+        changes = ", ".join(
+            f"**{FEATURE_LABELS[feature]}** {input_data[feature]:g} → {suggestion[feature]:g}"
+            for feature in suggestion["changed"]
+        )
+        st.markdown(f"- {changes} (probability of leaving {suggestion['probability_leave'] * 100:.1f}%)")
+    st.caption(
+        f"Satisfaction is only raised and monthly hours only cut; projects can move either way, "
+        f"since under-used employees leave too. Cheapest changes first, measured as a share of each input's range; "
+        f"{search['scored']:,} of {search['candidates']:,} candidate edits scored in {search['seconds'] * 1000:.0f} ms."
+    )
+
+# ============================================================================
+# WHAT-IF SENSITIVITY
+# ============================================================================
+def render_sensitivity(predictor, input_data, cache):
+    """Sweep one or two inputs over their full range in a single batched call"""
+    st.markdown("---")
+    st.subheader("📈 What-if Sensitivity")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        x_feature = st.selectbox(
+            "Vary",
+            BEST_FEATURES,
+            index=BEST_FEATURES.index("average_monthly_hours"),
+            format_func=FEATURE_LABELS.get,
+            key="sweep_x"
+        )
+    with col2:
+        y_feature = st.selectbox(
+            "Against (optional)",
+            [None] + [feature for feature in BEST_FEATURES if feature != x_feature],
+            format_func=lambda feature: "—" if feature is None else FEATURE_LABELS[feature],
+            key="sweep_y"
+        )
+    
+    with metrics.timed("sensitivity_sweep"):
+        sweep = sensitivity_sweep(predictor, input_data, x_feature, y_feature, cache)
+    sweep["probability_leave"] *= 100
+    
+    if y_feature is None:
+        chart = alt.Chart(sweep).mark_line(color="#dc3545").encode(
+            x=alt.X(f"{x_feature}:Q", title=FEATURE_LABELS[x_feature]),
+            y=alt.Y("probability_leave:Q", title="Probability of Leaving (%)", scale=alt.Scale(domain=[0, 100]))
+        )
+    else:
+        chart = alt.Chart(sweep).mark_rect().encode(
+            x=alt.X(f"{x_feature}:O", title=FEATURE_LABELS[x_feature], axis=alt.Axis(labelOverlap=True)),
+            y=alt.Y(f"{y_feature}:O", title=FEATURE_LABELS[y_feature], sort="descending", axis=alt.Axis(labelOverlap=True)),
+            color=alt.Color(
+                "probability_leave:Q",
+                title="Leave %",
+                scale=alt.Scale(scheme="redyellowgreen", reverse=True, domain=[0, 100])
+            )
+        )
+    st.altair_chart(chart, use_container_width=True)
+    st.caption(f"{len(sweep):,} scenarios scored in one batch; other inputs held at their current values.")
+
 # ============================================================================
 # MAIN APPLICATION
 # ============================================================================
@@ -405,12 +734,36 @@ def main():
     st.markdown('<p class="sub-header">Predict whether an employee is likely to leave the company</p>', unsafe_allow_html=True)
     
     # Load model silently
-    model = load_model_from_huggingface()
+    with metrics.timed("get_model"):
+        active = get_active_model()
     
-    if model is None:
-        st.error("❌ Failed to load model. Please check the Hugging Face repository.")
+    if active is None:
+        st.error("❌ Failed to load model. Please check the local model store or the Hugging Face repository.")
         st.info(f"Repository: https://huggingface.co/{HF_REPO_ID}")
         return
+    # Read once per rerun: a hot swap mid-run does not mix two models
+    model, engine, explainer = active.model, active.engine, active.explainer
+    st.caption(f"Model version: {active.version} ({active.backend} backend)")
+    
+    # Cached predictions are dropped whenever a different model is loaded
+    cache = get_prediction_cache()
+    cache.bind_model(model, engine)
+    
+    monitor = get_drift_monitor()
+    audit_log = get_audit_log()
+    
+    mode = st.radio(
+        "Mode",
+        ["👤 Single Employee", "📂 Bulk CSV", "🏢 Organization"],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    if mode == "📂 Bulk CSV":
+        render_batch_mode(active, cache, monitor, audit_log)
+        return
+    if mode == "🏢 Organization":
+        render_organization(active, audit_log)
+        return
     
     # ========================================================================
     # MAIN INPUT SECTION
@@ -569,24 +922,50 @@ def main():
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        predict_button = st.button("🔮 Predict Employee Turnover", use_container_width=True)
+        live_mode = st.toggle(
+            "⚡ Live prediction",
+            key="live_mode",
+            help="Update the prediction as the inputs change, without pressing the button"
+        )
+        if live_mode:
+            predict_button = False
+            st.caption("The prediction updates shortly after you change an input.")
+        else:
+            predict_button = st.button("🔮 Predict Employee Turnover", use_container_width=True)
+    
+    predictor = active.predictor if USE_COMPILED_FOREST else model
+    
+    new_inputs = debounce_live_inputs(input_data) if live_mode else True
     
     # ========================================================================
     # PREDICTION RESULTS
     # ========================================================================
-    if predict_button:
+    if predict_button or live_mode:
+        # In live mode a pending rerun takes over here, before the forest call
+        st.markdown("---")
+        st.subheader("🎯 Prediction Results")
+        
         # Create input DataFrame with correct feature order
-        input_df = pd.DataFrame([input_data])[BEST_FEATURES]
+        with metrics.timed("build_input_frame"):
+            input_df = pd.DataFrame([input_data])[BEST_FEATURES]
         
-        # Make prediction
-        prediction = model.predict(input_df)[0]
-        prediction_proba = model.predict_proba(input_df)[0]
+        # Make prediction (single forest pass for label and probabilities)
+        with metrics.timed("predict"):
+            predictions, probabilities = predict(predictor, input_df, DECISION_THRESHOLD, cache)
+        # Live reruns with unchanged inputs (e.g. toggling the sweep) show the
+        # same prediction again; count, monitor and audit it only once
+        if new_inputs:
+            metrics.inc("predictions_total")
+            monitor.update(input_df)
+            audit_log.record(input_df, probabilities[:, 1], predictions, active.version,
+                             "live" if live_mode else "single")
+        prediction = predictions[0]
+        prediction_proba = probabilities[0]
         
         prob_stay = prediction_proba[0] * 100
         prob_leave = prediction_proba[1] * 100
         
-        st.markdown("---")
-        st.subheader("🎯 Prediction Results")
+        results_timer = metrics.start_timer("render_results")
         
         # Results in two columns
         col1, col2 = st.columns(2)
@@ -629,9 +1008,21 @@ def main():
                 <div class="progress-bar-red" style="width: {prob_leave}%;"></div>
             </div>
             """, unsafe_allow_html=True)
+        results_timer.stop()
+        
+        render_explanation(explainer, input_df)
+        if prediction == 1:
+            render_retention_suggestions(engine, input_data)
+    
+    # ========================================================================
+    # WHAT-IF SENSITIVITY
+    # ========================================================================
+    if st.toggle("📈 Show what-if sensitivity", key="show_sensitivity"):
+        render_sensitivity(predictor, input_data, cache)
 
 # ============================================================================
 # RUN APPLICATION
 # ============================================================================
 if __name__ == "__main__":
     main()
+    rerun_timer.stop()
@@ -0,0 +1,262 @@
+import argparse
+import atexit
+import contextlib
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from scoring import BEST_FEATURES, prepare_features
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Defaults to the temp directory so read-only app deploys can still write it;
+# set CHURN_AUDIT_DB to keep the log somewhere durable
+AUDIT_DB_PATH = os.environ.get(
+    "CHURN_AUDIT_DB", os.path.join(tempfile.gettempdir(), "churn_audit_log.sqlite")
+)
+
+# Prediction rows waiting to be written (about 64 bytes each)
+AUDIT_QUEUE_ROWS = 1_000_000
+
+# Large calls (bulk uploads, rollups) are queued in chunks of this many rows
+AUDIT_CHUNK_ROWS = 50_000
+
+# Longest a queued prediction waits before it is written
+AUDIT_FLUSH_INTERVAL = 1.0
+
+# Queued calls written per transaction
+AUDIT_BATCH_SIZE = 100
+
+# How long a caller waits for queue space before a chunk is dropped (and counted)
+AUDIT_PUT_TIMEOUT = 0.05
+
+COLUMNS = ["timestamp", "model_version", "source"] + BEST_FEATURES + [
+    "probability_leave", "prediction"
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    model_version TEXT NOT NULL,
+    source TEXT NOT NULL,
+    {", ".join(f"{feature} REAL NOT NULL" for feature in BEST_FEATURES)},
+    probability_leave REAL NOT NULL,
+    prediction INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_timestamp ON predictions (timestamp);
+CREATE INDEX IF NOT EXISTS predictions_version_timestamp ON predictions (model_version, timestamp);
+"""
+
+# ============================================================================
+# AUDIT LOG
+# ============================================================================
+class AuditLog:
+    """Prediction audit trail written to SQLite off the request path
+
+    ``record`` only puts the call's arrays on a queue bounded by rows, in
+    chunks of ``AUDIT_CHUNK_ROWS``. A background thread drains it and
+    inserts everything that arrived within ``flush_interval`` (or
+    ``batch_size`` chunks) in one transaction. When the queue stays full for
+    ``AUDIT_PUT_TIMEOUT`` the chunk is dropped and counted rather than
+    stalling the app. ``close`` (also run at
+    interpreter exit) writes whatever is still queued. The table is indexed
+    on timestamp and model version, and WAL mode lets ``query`` read while
+    the writer appends.
+    """
+
+    def __init__(self, path=AUDIT_DB_PATH, max_queued_rows=AUDIT_QUEUE_ROWS,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, batch_size=AUDIT_BATCH_SIZE):
+        self.path = path
+        self.max_queued_rows = max_queued_rows
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._queue = queue.Queue()
+        self._queued_rows = 0
+        self._room = threading.Condition()
+        self._closed = False
+        with contextlib.closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record(self, features, probability_leave, predictions, model_version, source="app"):
+        """Queue predictions (one row per employee in ``features``) for writing"""
+        if self._closed:
+            raise RuntimeError("Audit log is closed")
+        if isinstance(features, pd.DataFrame):
+            # The app's input frames are already in feature order; renaming costs more than the rest
+            if list(features.columns) != BEST_FEATURES:
+                features = prepare_features(features)
+            features = features.to_numpy(dtype=np.float64)
+        timestamp = time.time()
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(BEST_FEATURES))
+        probability_leave = np.asarray(probability_leave, dtype=np.float64).ravel()
+        predictions = np.asarray(predictions, dtype=np.int64).ravel()
+        for start in range(0, len(predictions), AUDIT_CHUNK_ROWS):
+            end = start + AUDIT_CHUNK_ROWS
+            n_rows = len(predictions[start:end])
+            if not self._reserve(n_rows):
+                self.dropped += n_rows
+                logger.error("Audit queue full; dropped %d prediction records", n_rows)
+                continue
+            self._queue.put((timestamp, str(model_version), source, features[start:end],
+                             probability_leave[start:end], predictions[start:end]))
+
+    def _reserve(self, n_rows):
+        """Claim queue space for ``n_rows``, waiting up to ``AUDIT_PUT_TIMEOUT``"""
+        with self._room:
+            if not self._room.wait_for(lambda: self._queued_rows + n_rows <= self.max_queued_rows,
+                                       timeout=AUDIT_PUT_TIMEOUT):
+                return False
+            self._queued_rows += n_rows
+            return True
+
+    def _release(self, n_rows):
+        with self._room:
+            self._queued_rows -= n_rows
+            self._room.notify_all()
+
+    def _run(self):
+        # SQLite connections belong to the thread that opened them
+        with contextlib.closing(self._connect()) as connection:
+            self._drain(connection)
+
+    def _drain(self, connection):
+        while True:
+            entries = []
+            try:
+                entries.append(self._queue.get(timeout=self.flush_interval))
+                deadline = time.monotonic() + self.flush_interval
+                while len(entries) < self.batch_size and entries[-1] is not None:
+                    entries.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            stop = bool(entries) and entries[-1] is None
+            records = [entry for entry in entries if entry is not None]
+            if records:
+                try:
+                    self._write(connection, records)
+                except Exception:
+                    logger.exception("Failed to write %d audit entries", len(records))
+                self._release(sum(len(entry[5]) for entry in records))
+            for _ in entries:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, connection, entries):
+        rows = []
+        for timestamp, model_version, source, features, probability_leave, predictions in entries:
+            rows.extend(
+                (timestamp, model_version, source, *feature_values, proba, prediction)
+                for feature_values, proba, prediction in zip(
+                    features.tolist(), probability_leave.tolist(), predictions.tolist()
+                )
+            )
+        with connection:
+            connection.executemany(
+                f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+        self.rows_written += len(rows)
+        self.flushes += 1
+
+    def flush(self):
+        """Block until everything queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write what is still queued and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "queued_rows": self._queued_rows,
+            "rows_written": self.rows_written,
+            "dropped": self.dropped,
+            "flushes": self.flushes
+        }
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+def _utc_seconds(value):
+    """Epoch seconds of a datetime or ISO string; naive values are taken as UTC"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC").timestamp()
+    return timestamp.tz_convert("UTC").timestamp()
+
+
+def query_audit_log(path=AUDIT_DB_PATH, since=None, until=None, model_version=None, limit=1_000):
+    """Audit records in a time range (datetimes or ISO strings), newest first
+
+    Filters use the timestamp and model-version indexes, so a query reads
+    only the matching rows rather than the whole log.
+    """
+    conditions, params = [], []
+    if model_version is not None:
+        conditions.append("model_version = ?")
+        params.append(model_version)
+    if since is not None:
+        conditions.append("timestamp >= ?")
+        params.append(_utc_seconds(since))
+    if until is not None:
+        conditions.append("timestamp < ?")
+        params.append(_utc_seconds(until))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with contextlib.closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as connection:
+        records = pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM predictions {where} ORDER BY timestamp DESC LIMIT ?",
+            connection, params=params + [limit]
+        )
+    records["timestamp"] = pd.to_datetime(records["timestamp"], unit="s", utc=True)
+    return records
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the prediction audit log")
+    parser.add_argument("--db", default=AUDIT_DB_PATH, help="Audit log SQLite file")
+    parser.add_argument("--since", help="Earliest timestamp (ISO 8601, UTC)")
+    parser.add_argument("--until", help="Latest timestamp, exclusive (ISO 8601, UTC)")
+    parser.add_argument("--version", help="Only predictions from this model version")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--output", help="Write the records to this CSV instead of printing them")
+    args = parser.parse_args(argv)
+
+    records = query_audit_log(args.db, args.since, args.until, args.version, args.limit)
+    if args.output:
+        records.to_csv(args.output, index=False)
+        print(f"Wrote {len(records)} audit records to {args.output}")
+    else:
+        print(records.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from forest_engine import CompiledForest
+from model_store import MODEL_STORE_DIR, file_sha256, load_from_store, read_manifest
+from onnx_backend import OnnxForest, check_onnx_parity, export_onnx, ort
+from parallel_scoring import ParallelScorer
+from scoring import BEST_FEATURES, DATA_PATH, predict, prepare_features
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+DEFAULT_BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+# Single-row timings repeat until both limits are reached
+SINGLE_ROW_REPEATS = 200
+MIN_SECONDS_PER_TIMING = 1.0
+
+# Rows used to measure n_jobs scaling
+N_JOBS_BATCH_SIZE = 100_000
+
+# Rows used to measure process-pool scaling of the compiled engine
+WORKERS_BATCH_SIZE = 400_000
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+def _summarize_ms(samples):
+    samples = np.asarray(samples) * 1000
+    return {
+        "runs": len(samples),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "min_ms": float(samples.min())
+    }
+
+
+def time_calls(fn, min_repeats=5, min_seconds=MIN_SECONDS_PER_TIMING):
+    """Call ``fn`` repeatedly and return per-call latency statistics"""
+    fn()  # warm-up
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < min_repeats or time.perf_counter() - started < min_seconds:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _summarize_ms(samples)
+
+
+def synthesize_rows(n_rows, data_path=DATA_PATH, seed=0):
+    """Sample ``n_rows`` employees (with replacement) from the bundled dataset"""
+    features = prepare_features(pd.read_csv(data_path))
+    rng = np.random.default_rng(seed)
+    return features.iloc[rng.integers(0, len(features), n_rows)].reset_index(drop=True)
+
+
+def fresh_process_seconds(statement, setup=""):
+    """Seconds ``statement`` takes in a new interpreter, after running ``setup``"""
+    script = f"{setup}\nimport time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _parallel_levels():
+    """1, 2, 4, 8, 16 and the core count, capped at the core count"""
+    cpu_count = os.cpu_count() or 1
+    return sorted({1, 2, 4, 8, 16, cpu_count} & set(range(1, cpu_count + 1)))
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+def bench_load(model_path, store_dir):
+    """Model load time in a fresh interpreter (cold) and in this process (warm)"""
+    if model_path:
+        load_snippet = f"import joblib; joblib.load({model_path!r})"
+    else:
+        load_snippet = f"from model_store import load_from_store; load_from_store({store_dir!r})"
+    script = (
+        "import time; start = time.perf_counter(); "
+        f"{load_snippet}; "
+        "print(time.perf_counter() - start)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    cold_seconds = float(result.stdout.strip().splitlines()[-1])
+
+    load = (lambda: joblib.load(model_path)) if model_path else (lambda: load_from_store(store_dir))
+    warm = time_calls(load, min_repeats=3, min_seconds=0)
+    return {"cold_process_seconds": cold_seconds, "warm": warm}
+
+
+def bench_single_row(model, engine, row):
+    """Latency of one prediction through the app's paths"""
+    record = row.iloc[0].to_dict()
+
+    def legacy_two_pass():
+        input_df = pd.DataFrame([record])[BEST_FEATURES]
+        model.predict(input_df)
+        model.predict_proba(input_df)
+
+    def single_pass():
+        predict(model, pd.DataFrame([record])[BEST_FEATURES])
+
+    def compiled():
+        predict(engine, pd.DataFrame([record])[BEST_FEATURES])
+
+    return {
+        "legacy_predict_and_predict_proba": time_calls(legacy_two_pass, SINGLE_ROW_REPEATS),
+        "sklearn_single_pass": time_calls(single_pass, SINGLE_ROW_REPEATS),
+        "compiled_engine": time_calls(compiled, SINGLE_ROW_REPEATS)
+    }
+
+
+def bench_batches(model, engine, batch_sizes):
+    """Throughput of predict_proba on synthesized batches"""
+    results = []
+    for n_rows in batch_sizes:
+        X = synthesize_rows(n_rows)
+        entry = {"rows": n_rows}
+        for name, predictor in [("sklearn", model), ("compiled_engine", engine)]:
+            # Large batches are timed once; small ones repeat for stable numbers
+            large = n_rows >= 100_000
+            stats = time_calls(
+                lambda: predictor.predict_proba(X),
+                min_repeats=1 if large else 5,
+                min_seconds=0 if large else MIN_SECONDS_PER_TIMING
+            )
+            stats["rows_per_second"] = n_rows / (stats["p50_ms"] / 1000)
+            entry[name] = stats
+        results.append(entry)
+        print(f"  batch {n_rows:>9,}: sklearn {entry['sklearn']['rows_per_second']:>12,.0f} rows/s, "
+              f"compiled {entry['compiled_engine']['rows_per_second']:>12,.0f} rows/s")
+    return results
+
+
+def bench_n_jobs(model, n_rows=N_JOBS_BATCH_SIZE):
+    """Batch throughput as sklearn's n_jobs grows up to the core count"""
+    X = synthesize_rows(n_rows)
+    results = []
+    for n_jobs in _parallel_levels():
+        # Shallow copy shares the fitted trees; only n_jobs differs
+        parallel_model = copy.copy(model)
+        parallel_model.n_jobs = n_jobs
+        stats = time_calls(lambda: parallel_model.predict_proba(X), min_repeats=1, min_seconds=0)
+        stats["n_jobs"] = n_jobs
+        stats["rows_per_second"] = n_rows / (stats["p50_ms"] / 1000)
+        results.append(stats)
+        print(f"  n_jobs={n_jobs:>2}: {stats['rows_per_second']:>12,.0f} rows/s")
+    return results
+
+def bench_workers(engine, n_rows=WORKERS_BATCH_SIZE):
+    """Throughput of process-pool scoring over a shared memory-mapped engine"""
+    X = synthesize_rows(n_rows)
+    results = []
+    for n_workers in _parallel_levels():
+        with ParallelScorer(engine, n_workers=n_workers) as scorer:
+            stats = time_calls(lambda: scorer.predict_proba(X), min_repeats=1, min_seconds=0)
+        stats["workers"] = n_workers
+        stats["rows_per_second"] = n_rows / (stats["p50_ms"] / 1000)
+        baseline = results[0]["rows_per_second"] if results else stats["rows_per_second"]
+        stats["speedup"] = stats["rows_per_second"] / baseline
+        results.append(stats)
+        print(f"  workers={n_workers:>2}: {stats['rows_per_second']:>12,.0f} rows/s "
+              f"({stats['speedup']:.2f}x)")
+    return results
+
+def bench_onnx(model, model_path, onnx_path, batch_sizes):
+    """ONNX runtime backend against sklearn: import, cold load and batch latency"""
+    backend = OnnxForest(onnx_path)
+    results = {
+        "max_abs_diff": check_onnx_parity(model, backend),
+        "import_seconds": {
+            "sklearn": fresh_process_seconds("import sklearn.ensemble"),
+            "onnxruntime": fresh_process_seconds("import onnxruntime")
+        },
+        "cold_load_seconds": {
+            "sklearn": fresh_process_seconds(f"joblib.load({model_path!r})", "import joblib, sklearn.ensemble"),
+            "onnxruntime": fresh_process_seconds(f"OnnxForest({onnx_path!r})", "from onnx_backend import OnnxForest")
+        },
+        "batch": []
+    }
+    for n_rows in batch_sizes:
+        X = synthesize_rows(n_rows)
+        entry = {"rows": n_rows}
+        for name, predictor in [("sklearn", model), ("onnxruntime", backend)]:
+            large = n_rows >= 100_000
+            stats = time_calls(
+                lambda: predictor.predict_proba(X),
+                min_repeats=1 if large else 5,
+                min_seconds=0 if large else MIN_SECONDS_PER_TIMING
+            )
+            stats["rows_per_second"] = n_rows / (stats["p50_ms"] / 1000)
+            entry[name] = stats
+        results["batch"].append(entry)
+        print(f"  batch {n_rows:>9,}: sklearn p50 {entry['sklearn']['p50_ms']:>10.3f} ms, "
+              f"onnxruntime p50 {entry['onnxruntime']['p50_ms']:>10.3f} ms")
+    return results
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model load, inference and batch throughput")
+    parser.add_argument("--model", help="Joblib model file (default: the local model store)")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES,
+                        help="Batch sizes to measure")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    manifest = None
+    if args.model:
+        model = joblib.load(args.model)
+        engine = CompiledForest(model)
+        model_info = {"path": args.model, "sha256": file_sha256(args.model)}
+    else:
+        model, engine, _ = load_from_store(args.store, backend="sklearn")
+        engine = engine if engine is not None else CompiledForest(model)
+        manifest = read_manifest(args.store)
+        model_info = {
+            "version": manifest["version"],
+            "sha256": manifest.get("model_sha256", manifest.get("engine_sha256"))
+        }
+    model_info.update({"n_estimators": engine.n_trees, "n_nodes": engine.n_nodes})
+
+    print("Measuring model load...")
+    load = bench_load(args.model, args.store)
+    print("Measuring single-row latency...")
+    single_row = bench_single_row(model, engine, synthesize_rows(1))
+    print("Measuring batch throughput...")
+    batches = bench_batches(model, engine, args.sizes)
+    print("Measuring n_jobs scaling...")
+    n_jobs = bench_n_jobs(model)
+    print("Measuring process-pool scaling...")
+    workers = bench_workers(engine)
+
+    onnx = None
+    model_path = args.model or (manifest.get("model_file") and os.path.join(args.store, manifest["model_file"]))
+    if ort is None or not model_path:
+        print("Skipping the ONNX backend (needs onnxruntime and a sklearn model)")
+    else:
+        print("Measuring the ONNX backend...")
+        with tempfile.TemporaryDirectory() as scratch:
+            if manifest is not None and manifest.get("onnx_file"):
+                onnx_path = os.path.join(args.store, manifest["onnx_file"])
+            else:
+                onnx_path = export_onnx(model, os.path.join(scratch, "model.onnx"))
+            onnx = bench_onnx(model, os.path.abspath(model_path), os.path.abspath(onnx_path), args.sizes)
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "model": model_info,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scikit_learn": sklearn.__version__
+        },
+        "load": load,
+        "single_row": single_row,
+        "batch": batches,
+        "n_jobs_scaling": n_jobs,
+        "workers_scaling": workers,
+        "onnx": onnx
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, stats in single_row.items():
+        print(f"  single row {name}: p50 {stats['p50_ms']:.3f} ms")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
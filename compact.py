@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+
+from benchmark import synthesize_rows, time_calls
+from forest_engine import CompiledForest
+from model_store import MODEL_STORE_DIR, load_from_store, publish_model
+from scoring import DATA_PATH, predict
+from train import RANDOM_STATE, classification_metrics, load_training_data
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Tree counts and depth caps tried by default (on top of the full forest)
+DEFAULT_TREE_COUNTS = [50, 25]
+DEFAULT_DEPTH_CAPS = [12, 8]
+
+# Training rows used to rank trees during greedy selection
+SELECTION_ROWS = 5_000
+
+# Rows per batch when timing each variant
+LATENCY_BATCH_ROWS = 10_000
+
+DEFAULT_OUTPUT = "compaction_results.json"
+
+# Probability column of the "left" class
+LEAVE_CLASS_INDEX = 1
+
+# ============================================================================
+# TREE TRANSFORMS
+# ============================================================================
+def prune_unreachable(tree):
+    """Drop nodes no longer reachable from the root and renumber in preorder"""
+    left, right = tree["children_left"], tree["children_right"]
+    order, stack = [], [0]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if left[node] != -1:
+            stack += [right[node], left[node]]
+    order = np.array(order, dtype=np.intp)
+    new_index = np.full(len(left), -1, dtype=np.intp)
+    new_index[order] = np.arange(len(order))
+
+    def remap(children):
+        children = children[order]
+        return np.where(children == -1, -1, new_index[children])
+
+    return {
+        "children_left": remap(left),
+        "children_right": remap(right),
+        "feature": tree["feature"][order],
+        "threshold": tree["threshold"][order],
+        "value": tree["value"][order]
+    }
+
+
+def cap_depth(tree, max_depth):
+    """Turn every split below ``max_depth`` into a leaf with that node's distribution"""
+    left = np.array(tree["children_left"])
+    right = np.array(tree["children_right"])
+    depth = np.zeros(len(left), dtype=np.intp)
+    frontier = np.array([0])
+    while len(frontier):
+        parents = frontier[left[frontier] != -1]
+        for children in (left[parents], right[parents]):
+            depth[children] = depth[parents] + 1
+        frontier = np.concatenate([left[parents], right[parents]])
+
+    cut = (depth >= max_depth) & (left != -1)
+    left[cut] = -1
+    right[cut] = -1
+    return prune_unreachable(dict(tree, children_left=left, children_right=right))
+
+
+def merge_identical_leaves(tree):
+    """Collapse splits whose two sides end in the same class distribution
+
+    Nodes are visited children-first, so a subtree whose leaves all predict
+    the same distribution collapses into one leaf. Predictions are unchanged.
+    """
+    left = np.array(tree["children_left"])
+    right = np.array(tree["children_right"])
+    value = np.array(tree["value"])
+    # Preorder numbering puts every child after its parent
+    for node in range(len(left) - 1, -1, -1):
+        l, r = left[node], right[node]
+        if l != -1 and left[l] == -1 and left[r] == -1 and np.array_equal(value[l], value[r]):
+            left[node] = right[node] = -1
+            value[node] = value[l]
+    return prune_unreachable(dict(tree, children_left=left, children_right=right, value=value))
+
+
+def select_trees(engine, X, n_trees):
+    """Greedily pick the trees that best reproduce the full forest on ``X``
+
+    Starting from an empty ensemble, each step adds the tree that brings the
+    averaged leave probability closest (mean squared error) to the full
+    forest's. Returns tree indices in the order they were chosen.
+    """
+    leaves = engine.apply(X)
+    per_tree = np.asarray(engine.leaf_values[:, LEAVE_CLASS_INDEX])[leaves.T]
+    target = per_tree.mean(axis=0)
+
+    selected = []
+    total = np.zeros(len(target))
+    for size in range(1, min(n_trees, engine.n_trees) + 1):
+        errors = (((total + per_tree) / size - target) ** 2).mean(axis=1)
+        errors[selected] = np.inf
+        best = int(errors.argmin())
+        selected.append(best)
+        total += per_tree[best]
+    return selected
+
+# ============================================================================
+# VARIANTS
+# ============================================================================
+def compact(engine, n_trees=None, max_depth=None, merge_leaves=False, float32=False, X_select=None):
+    """Build a reduced copy of ``engine`` with the requested transforms"""
+    trees = engine.tree_arrays()
+    if n_trees is not None and n_trees < engine.n_trees:
+        trees = [trees[index] for index in select_trees(engine, X_select, n_trees)]
+    if max_depth is not None:
+        trees = [cap_depth(tree, max_depth) for tree in trees]
+    if merge_leaves:
+        trees = [merge_identical_leaves(tree) for tree in trees]
+    return CompiledForest.from_tree_arrays(
+        trees, engine.classes_, engine.n_features_in_, engine.feature_names_in_,
+        value_dtype=np.float32 if float32 else np.float64
+    )
+
+
+def build_variants(engine, X_select, tree_counts=DEFAULT_TREE_COUNTS, depth_caps=DEFAULT_DEPTH_CAPS):
+    """The full forest plus one variant per option and a combined variant"""
+    variants = {
+        "full": engine,
+        "merged": compact(engine, merge_leaves=True),
+        "float32": compact(engine, float32=True)
+    }
+    for n_trees in tree_counts:
+        variants[f"trees-{n_trees}"] = compact(engine, n_trees=n_trees, X_select=X_select)
+    for max_depth in depth_caps:
+        variants[f"depth-{max_depth}"] = compact(engine, max_depth=max_depth)
+    if tree_counts:
+        variants["combined"] = compact(
+            engine, n_trees=max(tree_counts), merge_leaves=True, float32=True, X_select=X_select
+        )
+    return variants
+
+# ============================================================================
+# EVALUATION
+# ============================================================================
+def disk_bytes(engine):
+    """Size of the engine as published to the model store"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "engine.joblib")
+        joblib.dump(engine, path)
+        return os.path.getsize(path)
+
+
+def evaluate_variant(engine, X_test, y_test, X_latency):
+    """Size on disk, node array bytes, batch latency and held-out metrics of one variant"""
+    predictions, _ = predict(engine, X_test)
+    latency = time_calls(lambda: engine.predict_proba(X_latency))
+    return {
+        "n_trees": engine.n_trees,
+        "n_nodes": engine.n_nodes,
+        "disk_bytes": disk_bytes(engine),
+        "node_bytes": engine.nbytes,
+        "batch_p50_ms": latency["p50_ms"],
+        "batch_rows_per_second": len(X_latency) / (latency["p50_ms"] / 1000),
+        "test": classification_metrics(y_test, predictions)
+    }
+
+
+def compare_variants(variants, X_test, y_test, X_latency):
+    """Evaluate every variant and add metric changes relative to ``full``"""
+    results = {name: evaluate_variant(engine, X_test, y_test, X_latency)
+               for name, engine in variants.items()}
+    baseline = results["full"]["test"]
+    for result in results.values():
+        result["test_change"] = {key: value - baseline[key] for key, value in result["test"].items()}
+    return results
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and compare compacted forest variants")
+    parser.add_argument("--model", help="Joblib model file (default: the local model store)")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    parser.add_argument("--data", default=DATA_PATH, help="Training CSV (for the held-out split)")
+    parser.add_argument("--trees", type=int, nargs="*", default=DEFAULT_TREE_COUNTS,
+                        help="Tree counts to select greedily")
+    parser.add_argument("--depths", type=int, nargs="*", default=DEFAULT_DEPTH_CAPS,
+                        help="Maximum depths to cap trees at")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--publish", metavar="VARIANT", help="Publish this variant to the store")
+    parser.add_argument("--version", help="Version for the published variant")
+    args = parser.parse_args(argv)
+
+    if args.model:
+        engine = CompiledForest(joblib.load(args.model))
+    else:
+        model, engine, _ = load_from_store(args.store)
+        engine = engine if engine is not None else CompiledForest(model)
+
+    X_train, X_test, _, y_test = load_training_data(args.data)
+    X_select = X_train.sample(min(SELECTION_ROWS, len(X_train)), random_state=RANDOM_STATE)
+    variants = build_variants(engine, X_select, args.trees, args.depths)
+    results = compare_variants(variants, X_test, y_test, synthesize_rows(LATENCY_BATCH_ROWS))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'variant':<10} {'trees':>5} {'nodes':>7} {'disk MB':>8} {'node MB':>7} {'rows/s':>10} "
+          f"{'Δrec(L)':>8} {'Δrec(S)':>8} {'Δprec(L)':>8} {'Δprec(S)':>8}")
+    for name, result in results.items():
+        change = result["test_change"]
+        print(f"{name:<10} {result['n_trees']:>5} {result['n_nodes']:>7,} "
+              f"{result['disk_bytes'] / 2**20:>8.2f} {result['node_bytes'] / 2**20:>7.2f} "
+              f"{result['batch_rows_per_second']:>10,.0f} {change['recall_left']:>+8.4f} "
+              f"{change['recall_stayed']:>+8.4f} {change['precision_left']:>+8.4f} "
+              f"{change['precision_stayed']:>+8.4f}")
+    print(f"Results written to {args.output}")
+
+    if args.publish:
+        if args.publish not in variants:
+            parser.error(f"unknown variant {args.publish!r}; choose from {', '.join(variants)}")
+        manifest = publish_model(
+            variants[args.publish], args.store, version=args.version,
+            metadata={"compaction": {"variant": args.publish, **results[args.publish]}}
+        )
+        print(f"Published variant {args.publish} as version {manifest['version']}")
+
+
+if __name__ == "__main__":
+    main()
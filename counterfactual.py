@@ -0,0 +1,202 @@
+import argparse
+import itertools
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from forest_engine import CompiledForest
+from model_store import MODEL_STORE_DIR, load_model
+from scoring import BEST_FEATURES, DEFAULT_THRESHOLD, FEATURE_RANGES
+from sensitivity import feature_grid
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Features a manager can act on and the direction each may move in. Tenure
+# is left alone, satisfaction is only raised and hours are only cut: asking
+# a leaver to work longer is not a retention offer. Projects may go either
+# way, because the dataset's leavers are both overloaded staff and
+# under-used staff on two projects, for whom more work is the remedy
+ACTIONABLE_FEATURES = {
+    "satisfaction_level": "increase",
+    "average_monthly_hours": "decrease",
+    "number_project": "any",
+    "last_evaluation": "any"
+}
+
+# Most features a single suggestion may change
+MAX_CHANGED_FEATURES = 3
+
+# Suggestions returned per employee
+DEFAULT_SUGGESTIONS = 3
+
+# Stop scoring candidates after this long and return what was found so far
+LATENCY_BUDGET_SECONDS = 0.5
+
+# Candidates scored per forest call
+CANDIDATE_BATCH_ROWS = 4_096
+
+# ============================================================================
+# CANDIDATE GENERATION
+# ============================================================================
+def split_thresholds(engine):
+    """Sorted distinct float32 split thresholds the forest uses on each feature"""
+    internal = ~engine.is_leaf
+    return [
+        np.unique(engine.threshold[internal & (engine.feature == index)])
+        for index in range(engine.n_features_in_)
+    ]
+
+
+def candidate_values(feature, base_value, thresholds):
+    """The cheapest reachable input value in each region between split thresholds
+
+    The forest only compares a feature against its split thresholds, so all
+    widget values between two neighbouring thresholds score the same; only
+    the one closest to the current value is worth trying. The current
+    value's own region is left out.
+    """
+    values = feature_grid(feature)
+    if ACTIONABLE_FEATURES[feature] == "increase":
+        values = values[values > base_value]
+    elif ACTIONABLE_FEATURES[feature] == "decrease":
+        values = values[values < base_value]
+    regions = np.searchsorted(thresholds, values.astype(np.float32), side="left")
+    base_region = np.searchsorted(thresholds, np.float32(base_value), side="left")
+
+    order = np.lexsort((np.abs(values - base_value), regions))
+    first_in_region = np.concatenate([[True], regions[order][1:] != regions[order][:-1]])
+    best = order[first_in_region]
+    return values[best[regions[best] != base_region]]
+
+
+def change_cost(feature, deltas):
+    """Size of a change as a share of the feature's input range"""
+    low, high, _ = FEATURE_RANGES[feature]
+    return np.abs(deltas) / (high - low)
+
+
+def generate_candidates(base, thresholds, max_changed=MAX_CHANGED_FEATURES):
+    """Every pruned edit of 1..``max_changed`` actionable features, cheapest first
+
+    Returns the candidate feature matrix, the cost of each row and the
+    index of the feature set (into the returned list of sets) it changes.
+    """
+    options = {}
+    for feature in ACTIONABLE_FEATURES:
+        index = BEST_FEATURES.index(feature)
+        values = candidate_values(feature, base[index], thresholds[index])
+        if len(values):
+            options[feature] = values
+
+    blocks, costs, set_ids, feature_sets = [], [], [], []
+    for n_changed in range(1, max_changed + 1):
+        for features in itertools.combinations(options, n_changed):
+            grids = np.meshgrid(*(options[feature] for feature in features), indexing="ij")
+            block = np.tile(base, (grids[0].size, 1))
+            cost = np.zeros(grids[0].size)
+            for feature, grid in zip(features, grids):
+                index = BEST_FEATURES.index(feature)
+                block[:, index] = grid.ravel()
+                cost += change_cost(feature, grid.ravel() - base[index])
+            blocks.append(block)
+            costs.append(cost)
+            set_ids.append(np.full(len(block), len(feature_sets)))
+            feature_sets.append(frozenset(features))
+
+    if not blocks:
+        return np.empty((0, len(BEST_FEATURES))), np.empty(0), np.empty(0, dtype=int), []
+    candidates, costs, set_ids = np.vstack(blocks), np.concatenate(costs), np.concatenate(set_ids)
+    order = np.argsort(costs, kind="stable")
+    return candidates[order], costs[order], set_ids[order], feature_sets
+
+# ============================================================================
+# COUNTERFACTUAL SEARCH
+# ============================================================================
+def recommend_changes(engine, record, threshold=DEFAULT_THRESHOLD, n_suggestions=DEFAULT_SUGGESTIONS,
+                      budget_seconds=LATENCY_BUDGET_SECONDS, max_changed=MAX_CHANGED_FEATURES):
+    """The smallest changes to an employee's inputs that turn LEAVE into STAY
+
+    Candidates are scored in cost order, in batches, through the compiled
+    forest until ``n_suggestions`` are found or the latency budget runs
+    out. Each suggestion changes a different set of features, and
+    candidates changing a set that contains an already successful one are
+    dropped before scoring, so the results are both cheap and distinct.
+    Returns a DataFrame (one row per suggestion: new feature values,
+    ``changed`` features, ``probability_leave`` and ``cost``) and a search
+    summary.
+    """
+    start = time.perf_counter()
+    base = np.array([float(record[feature]) for feature in BEST_FEATURES])
+    candidates, costs, set_ids, feature_sets = generate_candidates(
+        base, split_thresholds(engine), max_changed
+    )
+
+    found = []
+    blocked = np.zeros(len(feature_sets), dtype=bool)
+    n_scored = 0
+    position = 0
+    while len(found) < n_suggestions and position < len(candidates):
+        if time.perf_counter() - start > budget_seconds:
+            break
+        rows = np.arange(position, min(position + CANDIDATE_BATCH_ROWS, len(candidates)))
+        position = rows[-1] + 1
+        # Skip feature sets that contain one that already flips the prediction
+        rows = rows[~blocked[set_ids[rows]]]
+        if not len(rows):
+            continue
+        proba_leave = engine.predict_proba(candidates[rows])[:, 1]
+        n_scored += len(rows)
+        for row, proba in zip(rows[proba_leave <= threshold], proba_leave[proba_leave <= threshold]):
+            if blocked[set_ids[row]]:
+                continue
+            features = feature_sets[set_ids[row]]
+            found.append((row, proba))
+            blocked |= np.array([features <= other for other in feature_sets])
+            if len(found) >= n_suggestions:
+                break
+
+    suggestions = pd.DataFrame(candidates[[row for row, _ in found]].reshape(-1, len(BEST_FEATURES)),
+                               columns=BEST_FEATURES)
+    suggestions["changed"] = [
+        [feature for feature in BEST_FEATURES if feature in feature_sets[set_ids[row]]] for row, _ in found
+    ]
+    suggestions["probability_leave"] = [proba for _, proba in found]
+    suggestions["cost"] = costs[[row for row, _ in found]]
+    return suggestions, {
+        "candidates": len(candidates),
+        "scored": n_scored,
+        "seconds": time.perf_counter() - start,
+        "complete": len(found) >= n_suggestions or position >= len(candidates)
+    }
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suggest minimal changes that would keep an employee")
+    for feature in BEST_FEATURES:
+        parser.add_argument(f"--{feature.replace('_', '-')}", type=float, required=True)
+    parser.add_argument("--suggestions", type=int, default=DEFAULT_SUGGESTIONS)
+    parser.add_argument("--budget-seconds", type=float, default=LATENCY_BUDGET_SECONDS)
+    parser.add_argument("--model", help="Joblib model file (default: local store, then Hugging Face Hub)")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    args = parser.parse_args(argv)
+
+    if args.model:
+        engine = CompiledForest(joblib.load(args.model))
+    else:
+        model, engine, _ = load_model(args.store)
+        engine = engine if engine is not None else CompiledForest(model)
+    record = {feature: getattr(args, feature) for feature in BEST_FEATURES}
+    suggestions, summary = recommend_changes(engine, record, n_suggestions=args.suggestions,
+                                             budget_seconds=args.budget_seconds)
+    print(suggestions.to_string(index=False))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from scoring import BEST_FEATURES, DATA_PATH, FEATURE_RANGES, prepare_features
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Reference histograms of the training split, shipped so serving never has
+# to split the data (regenerate with: python drift.py --write-reference)
+REFERENCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data", "drift_reference.json")
+
+# Equal-width bins across the input range of each continuous feature;
+# integer features (years, projects) get one bin per value
+CONTINUOUS_BINS = 20
+
+# Probability floor for empty bins in the PSI log ratio
+PSI_EPSILON = 1e-4
+
+# Conventional PSI bands: below 0.1 stable, 0.1-0.25 moderate, above 0.25 major shift
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+
+# ============================================================================
+# BINNING
+# ============================================================================
+def feature_bins(feature):
+    """``(low, width, n_bins)`` of the equal-width histogram for a feature"""
+    low, high, step = FEATURE_RANGES[feature]
+    if step == 1:
+        # Bins centred on the integers low..high
+        return low - 0.5, 1.0, int(high - low) + 1
+    return low, (high - low) / CONTINUOUS_BINS, CONTINUOUS_BINS
+
+
+def _bin_layout(features):
+    """Per-feature lows, widths, bin counts and offsets into one flat count array
+
+    Each feature has its bins plus an underflow and an overflow bin, so
+    values outside the UI range still count towards drift.
+    """
+    lows, widths, n_bins = zip(*(feature_bins(feature) for feature in features))
+    n_bins = np.array(n_bins)
+    offsets = np.concatenate([[0], np.cumsum(n_bins + 2)[:-1]])
+    return np.array(lows, dtype=np.float64), np.array(widths), n_bins, offsets
+
+
+def histogram_counts(X, layout):
+    """Flat per-feature bin counts for a feature matrix, in one pass"""
+    lows, widths, n_bins, offsets = layout
+    X = np.asarray(X, dtype=np.float64)
+    # Bin index in constant time per value; -1 and n_bins are the outer bins
+    index = np.floor((X - lows) / widths)
+    # The last bin is closed on the right, so the UI maximum is in range
+    index[(index == n_bins) & (X <= lows + widths * n_bins)] -= 1
+    index = np.clip(np.nan_to_num(index, nan=-1.0), -1, n_bins).astype(np.intp) + 1
+    return np.bincount((index + offsets).ravel(), minlength=int((n_bins + 2).sum()))
+
+# ============================================================================
+# STATISTICS
+# ============================================================================
+def population_stability_index(reference, live, epsilon=PSI_EPSILON):
+    """PSI between two histograms over the same bins"""
+    expected = np.maximum(reference / reference.sum(), epsilon)
+    actual = np.maximum(live / live.sum(), epsilon)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(reference, live):
+    """Two-sample Kolmogorov-Smirnov distance between binned distributions
+
+    Exact for integer features; for continuous ones it is the largest CDF
+    gap at the bin edges, a lower bound on the unbinned statistic.
+    """
+    return float(np.abs(np.cumsum(reference) / reference.sum() - np.cumsum(live) / live.sum()).max())
+
+
+def psi_status(psi):
+    if psi < PSI_MODERATE:
+        return "stable"
+    return "moderate" if psi < PSI_MAJOR else "major"
+
+# ============================================================================
+# DRIFT MONITOR
+# ============================================================================
+class DriftMonitor:
+    """Live input histograms compared against the training distribution
+
+    ``update`` adds a batch of scored rows with one vectorized bincount, a
+    constant amount of work per row and feature, so it can stay on during
+    bulk scoring. ``report`` computes PSI and KS per feature on demand.
+    """
+
+    def __init__(self, reference_counts, features=BEST_FEATURES):
+        self.features = list(features)
+        self._layout = _bin_layout(self.features)
+        self.reference_counts = np.asarray(reference_counts, dtype=np.int64)
+        self._live_counts = np.zeros_like(self.reference_counts)
+        self._lock = threading.Lock()
+        self.rows = 0
+
+    @classmethod
+    def from_training_data(cls, data_path=DATA_PATH):
+        """Build reference histograms from the training split used by train.py, in memory"""
+        from train import split_training_data  # sklearn is only needed to split the data
+        X_train = split_training_data(data_path)[0]
+        return cls(histogram_counts(X_train[BEST_FEATURES].to_numpy(), _bin_layout(BEST_FEATURES)))
+
+    @classmethod
+    def from_reference(cls, path=REFERENCE_PATH):
+        """Monitor over the shipped reference histograms
+
+        Falls back to splitting the training data in memory when the file is
+        missing or was written for other features or bins. Nothing is
+        written to disk either way, so this is safe on read-only deploys.
+        """
+        try:
+            with open(path) as f:
+                reference = json.load(f)
+        except OSError:
+            return cls.from_training_data()
+        n_bins = int((_bin_layout(BEST_FEATURES)[2] + 2).sum())
+        if reference.get("features") != BEST_FEATURES or len(reference.get("counts", [])) != n_bins:
+            return cls.from_training_data()
+        return cls(reference["counts"])
+
+    def write_reference(self, path=REFERENCE_PATH):
+        """Save the reference histograms for ``from_reference``"""
+        with open(path, "w") as f:
+            json.dump({"features": self.features, "counts": self.reference_counts.tolist()}, f)
+            f.write("\n")
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            return prepare_features(X).to_numpy()
+        return np.asarray(X).reshape(-1, len(self.features))
+
+    def update(self, X):
+        """Add scored rows (DataFrame or matrix in feature order) to the live histograms"""
+        X = self._as_array(X)
+        if not len(X):
+            return
+        counts = histogram_counts(X, self._layout)
+        with self._lock:
+            self._live_counts += counts
+            self.rows += len(X)
+
+    def reset(self):
+        with self._lock:
+            self._live_counts[:] = 0
+            self.rows = 0
+
+    def _split(self, counts):
+        """Per-feature slices of a flat count array"""
+        _, _, n_bins, offsets = self._layout
+        return [counts[offset:offset + n + 2] for offset, n in zip(offsets, n_bins)]
+
+    def report(self):
+        """PSI, KS and status per feature for the rows seen so far"""
+        with self._lock:
+            live_counts = self._live_counts.copy()
+            rows = self.rows
+        features = {}
+        if rows:
+            for feature, reference, live in zip(
+                self.features, self._split(self.reference_counts), self._split(live_counts)
+            ):
+                psi = population_stability_index(reference, live)
+                features[feature] = {
+                    "psi": psi, "ks": ks_statistic(reference, live), "status": psi_status(psi)
+                }
+        return {"rows": rows, "features": features}
+
+    def stats(self):
+        """Flat gauges for the metrics registry"""
+        report = self.report()
+        gauges = {"rows": report["rows"]}
+        for feature, result in report["features"].items():
+            gauges[f"{feature}_psi"] = result["psi"]
+            gauges[f"{feature}_ks"] = result["ks"]
+        return gauges
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare an employee export with the training distribution")
+    parser.add_argument("input", nargs="?", help="CSV export to check")
+    parser.add_argument("--data", default=DATA_PATH, help="Training CSV for the reference histograms")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--write-reference", action="store_true",
+                        help="Rebuild the shipped reference histograms from --data and exit")
+    args = parser.parse_args(argv)
+
+    monitor = DriftMonitor.from_training_data(args.data)
+    if args.write_reference:
+        monitor.write_reference()
+        print(f"Wrote reference histograms ({len(monitor.reference_counts)} bins) to {REFERENCE_PATH}")
+        return
+    if args.input is None:
+        parser.error("an input CSV is required unless --write-reference is given")
+    for chunk in pd.read_csv(args.input, chunksize=args.chunk_size):
+        monitor.update(chunk)
+    print(json.dumps(monitor.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from forest_engine import CompiledForest
+from scoring import BEST_FEATURES
+
+# ============================================================================
+# FEATURE ATTRIBUTIONS
+# ============================================================================
+class ForestExplainer:
+    """Per-prediction feature contributions from random forest decision paths
+
+    Each split moves the class distribution from a node to its child; that
+    change is credited to the feature the node split on. Summing along a
+    path and averaging over trees gives, for every row,
+
+        probability_leave = bias + sum(contributions)
+
+    The sums are precomputed for every node, so explaining a batch only
+    needs the leaf each row lands in (one forest traversal) plus a gather.
+    """
+
+    def __init__(self, model, class_index=1):
+        engine = model if isinstance(model, CompiledForest) else CompiledForest(model)
+        self.engine = engine
+        self.class_index = class_index
+        self.feature_names = (
+            list(engine.feature_names_in_) if engine.feature_names_in_ is not None else BEST_FEATURES
+        )
+
+        node_value = np.asarray(engine.leaf_values[:, class_index])
+        is_leaf = np.asarray(engine.is_leaf)
+        children = np.asarray(engine.children).reshape(-1, 2)
+        feature = np.asarray(engine.feature)
+
+        # path_contributions[node, f]: change credited to feature f from root to node
+        path_contributions = np.zeros((engine.n_nodes, engine.n_features_in_))
+        frontier = np.asarray(engine.roots)
+        while len(frontier):
+            parents = frontier[~is_leaf[frontier]]
+            for child_column in range(2):
+                child = children[parents, child_column]
+                path_contributions[child] = path_contributions[parents]
+                path_contributions[child, feature[parents]] += node_value[child] - node_value[parents]
+            frontier = children[parents].ravel()
+
+        self.path_contributions = path_contributions
+        self.bias = float(node_value[engine.roots].mean())
+
+    def explain(self, X):
+        """Return ``(bias, contributions)`` for the probability of leaving
+
+        ``contributions`` is a DataFrame with one column per feature and one
+        row per input row, in probability units.
+        """
+        leaves = self.engine.apply(X)
+        contributions = np.zeros((len(leaves), self.engine.n_features_in_))
+        for tree_leaves in np.ascontiguousarray(leaves.T):
+            contributions += self.path_contributions[tree_leaves]
+        contributions /= self.engine.n_trees
+        index = X.index if isinstance(X, pd.DataFrame) else None
+        return self.bias, pd.DataFrame(contributions, columns=self.feature_names, index=index)
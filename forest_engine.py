@@ -0,0 +1,254 @@
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+
+from scoring import DATA_PATH, prepare_features
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Rows traversed together; bounds the (rows x trees) node-index working set
+ENGINE_CHUNK_SIZE = 4_096
+
+# Maximum absolute difference tolerated against sklearn's predict_proba
+PARITY_TOLERANCE = 1e-12
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+def _round_down_to_float32(thresholds):
+    """Cast float64 split thresholds to float32 without changing any split
+
+    Inputs are compared as float32, so ``x <= t`` holds exactly when ``x`` is
+    at most the largest float32 not above ``t``.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    rounded = thresholds.astype(np.float32)
+    too_high = rounded.astype(np.float64) > thresholds
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+def sklearn_tree_arrays(tree):
+    """Node arrays of a fitted sklearn tree, with class distributions normalized
+
+    Children use local indices with -1 at leaves, as in ``tree.children_left``;
+    ``value`` holds the class probabilities at every node, not only leaves.
+    """
+    value = tree.value[:, 0, :]
+    normalizer = value.sum(axis=1, keepdims=True)
+    normalizer[normalizer == 0.0] = 1.0
+    return {
+        "children_left": tree.children_left,
+        "children_right": tree.children_right,
+        "feature": tree.feature,
+        "threshold": tree.threshold,
+        "value": value / normalizer
+    }
+
+# ============================================================================
+# COMPILED FOREST
+# ============================================================================
+class CompiledForest:
+    """Array-backed random forest for fast batch and single-row inference
+
+    Every tree of a fitted RandomForestClassifier is flattened into shared,
+    contiguous node arrays (feature index, threshold, child pointers and
+    normalized leaf class probabilities). All trees are then advanced for a
+    whole batch of rows one level at a time with plain NumPy gathers, with
+    no per-call sklearn input validation or DataFrame handling.
+    """
+
+    def __init__(self, model):
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        trees = [sklearn_tree_arrays(estimator.tree_) for estimator in model.estimators_]
+        self._build(
+            trees, model.classes_, model.n_features_in_, getattr(model, "feature_names_in_", None)
+        )
+
+    @classmethod
+    def from_tree_arrays(cls, trees, classes, n_features_in, feature_names_in=None,
+                         value_dtype=np.float64):
+        """Build an engine from per-tree node arrays (see :func:`sklearn_tree_arrays`)"""
+        engine = cls.__new__(cls)
+        engine._build(trees, classes, n_features_in, feature_names_in, value_dtype)
+        return engine
+
+    def _build(self, trees, classes, n_features_in, feature_names_in, value_dtype=np.float64):
+        node_counts = np.array([len(tree["feature"]) for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+
+        features, thresholds, children, leaves, values = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            is_leaf = tree["children_left"] == -1
+            own_index = np.arange(len(is_leaf)) + offset
+            # Leaves point to themselves so extra steps leave them in place
+            left = np.where(is_leaf, own_index, tree["children_left"] + offset)
+            right = np.where(is_leaf, own_index, tree["children_right"] + offset)
+            features.append(np.where(is_leaf, 0, tree["feature"]))
+            thresholds.append(np.where(is_leaf, np.inf, tree["threshold"]))
+            # children[2 * node + go_left] is the next node
+            children.append(np.stack([right, left], axis=1).ravel())
+            leaves.append(is_leaf)
+            values.append(tree["value"])
+
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.feature_names_in_ = feature_names_in
+        self.n_trees = len(trees)
+        self.roots = offsets.astype(np.intp)
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = _round_down_to_float32(np.concatenate(thresholds))
+        self.children = np.ascontiguousarray(np.concatenate(children), dtype=np.intp)
+        self.is_leaf = np.concatenate(leaves)
+        self.leaf_values = np.ascontiguousarray(np.concatenate(values), dtype=value_dtype)
+
+    def tree_arrays(self):
+        """Split the engine back into per-tree node arrays with local indices"""
+        ends = np.append(self.roots[1:], self.n_nodes)
+        children = np.asarray(self.children).reshape(-1, 2)
+        trees = []
+        for start, end in zip(self.roots, ends):
+            is_leaf = np.asarray(self.is_leaf[start:end])
+            left = np.where(is_leaf, -1, children[start:end, 1] - start)
+            right = np.where(is_leaf, -1, children[start:end, 0] - start)
+            trees.append({
+                "children_left": left,
+                "children_right": right,
+                "feature": np.where(is_leaf, -2, self.feature[start:end]),
+                "threshold": np.where(is_leaf, -2.0, self.threshold[start:end].astype(np.float64)),
+                "value": np.array(self.leaf_values[start:end], dtype=np.float64)
+            })
+        return trees
+
+    @property
+    def nbytes(self):
+        """Memory held by the node arrays"""
+        arrays = [self.roots, self.feature, self.threshold, self.children, self.is_leaf, self.leaf_values]
+        return sum(array.nbytes for array in arrays)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _as_array(self, X):
+        """Convert input to the float32 matrix sklearn trees compare against"""
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names_in_ is not None and list(X.columns) != list(self.feature_names_in_):
+                X = X[self.feature_names_in_]
+            X = X.to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected {self.n_features_in_} features, got {X.shape[1]}"
+            )
+        # NaN and inf fail every "<=" and would silently follow the right branch
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity")
+        return X
+
+    def apply(self, X):
+        """Return the global leaf index reached in every tree for each row"""
+        X = self._as_array(X)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.intp)
+        for offset in range(0, len(X), ENGINE_CHUNK_SIZE):
+            chunk = X[offset:offset + ENGINE_CHUNK_SIZE]
+            leaves[offset:offset + len(chunk)] = self._traverse(chunk)
+        return leaves
+
+    def _traverse(self, X):
+        """Advance every (row, tree) pair together, one level per step
+
+        Pairs that have reached a leaf are dropped from the working set once
+        they make up more than half of it, so deep trees only cost extra
+        steps for the paths that are actually that deep.
+        """
+        n_rows = len(X)
+        # Feature-major layout: value of feature f for row r is at f * n_rows + r
+        feature_major = np.ascontiguousarray(X.T).ravel()
+        feature_offset = self.feature * n_rows
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows, dtype=np.intp), self.n_trees)
+        leaves = np.empty_like(nodes)
+        active = None
+
+        while True:
+            values = feature_major.take(feature_offset.take(nodes) + rows)
+            go_left = values <= self.threshold.take(nodes)
+            nodes = self.children.take(2 * nodes + go_left)
+            at_leaf = self.is_leaf.take(nodes)
+            n_done = np.count_nonzero(at_leaf)
+
+            if n_done == len(nodes) or n_done * 2 > len(nodes):
+                if active is None:
+                    leaves[:] = nodes
+                else:
+                    leaves[active] = nodes
+                if n_done == len(nodes):
+                    break
+                still_active = ~at_leaf
+                active = np.flatnonzero(still_active) if active is None else active[still_active]
+                nodes = nodes[still_active]
+                rows = rows[still_active]
+
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        """Average the leaf class probabilities over all trees"""
+        leaves_by_tree = np.ascontiguousarray(self.apply(X).T)
+        proba = np.zeros((leaves_by_tree.shape[1], len(self.classes_)))
+        # Accumulate tree by tree, in the same order as sklearn, for exact parity
+        for tree_leaves in leaves_by_tree:
+            proba += self.leaf_values.take(tree_leaves, axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Return the most probable class for each row"""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+# ============================================================================
+# PARITY CHECK
+# ============================================================================
+def check_parity(model, engine, X, tolerance=PARITY_TOLERANCE):
+    """Compare engine probabilities with sklearn's and return the max difference"""
+    expected = model.predict_proba(X)
+    actual = engine.predict_proba(X)
+    max_difference = float(np.abs(expected - actual).max()) if len(X) else 0.0
+    if max_difference > tolerance:
+        raise AssertionError(
+            f"Compiled forest differs from predict_proba by {max_difference:.3e} "
+            f"(tolerance {tolerance:.0e})"
+        )
+    return max_difference
+
+
+def main(model_path, data_path=DATA_PATH):
+    """Check parity on the bundled dataset and report engine speed-ups"""
+    model = joblib.load(model_path)
+    engine = CompiledForest(model)
+    X = prepare_features(pd.read_csv(data_path))
+
+    max_difference = check_parity(model, engine, X)
+    print(f"Parity OK on {len(X):,} rows (max |diff| = {max_difference:.1e})")
+
+    single_row = X.iloc[:1]
+    for name, predictor in [("sklearn", model), ("compiled", engine)]:
+        start = time.perf_counter()
+        for _ in range(50):
+            predictor.predict_proba(single_row)
+        single_ms = (time.perf_counter() - start) / 50 * 1000
+        start = time.perf_counter()
+        predictor.predict_proba(X)
+        rows_per_sec = len(X) / (time.perf_counter() - start)
+        print(f"{name:>9}: single row {single_ms:.3f} ms, batch {rows_per_sec:,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python forest_engine.py MODEL_PATH [DATA_PATH]")
+    main(*sys.argv[1:3])
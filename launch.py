@@ -0,0 +1,34 @@
+import logging
+import os
+import sys
+
+from streamlit.web import cli as streamlit_cli
+
+import metrics
+from model_runtime import get_runtime
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# ============================================================================
+# LAUNCHER
+# ============================================================================
+def main(argv=None):
+    """Start the model warm-up and readiness endpoint, then run the app
+
+    Streamlit only executes ``app.py`` once a browser connects. Launching
+    through this script loads and warms the model as soon as the process
+    starts, and ``/ready`` on the metrics port turns 200 when it is done.
+    Extra arguments are passed to ``streamlit run``.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    metrics.start_exporter()
+    get_runtime()
+    sys.argv = ["streamlit", "run", APP_PATH, *(sys.argv[1:] if argv is None else argv)]
+    sys.exit(streamlit_cli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+from tornado.websocket import websocket_connect
+
+from scoring import FEATURE_RANGES
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Concurrent sessions measured in turn
+DEFAULT_SESSION_LEVELS = [1, 2, 4, 8, 16]
+
+# Seconds each level keeps its sessions interacting
+LEVEL_DURATION_SECONDS = 30
+
+# Mean pause between one user's interactions (exponentially distributed)
+THINK_TIME_SECONDS = 1.0
+
+# p95 rerun latency a level must stay under to count as serving its users
+LATENCY_SLO_MS = 1_000
+
+# A level is saturated once it reaches this share of the best throughput seen
+SATURATION_THROUGHPUT_SHARE = 0.9
+
+SERVER_START_TIMEOUT = 120
+RERUN_TIMEOUT_SECONDS = 120
+
+DEFAULT_OUTPUT = "load_test_results.json"
+
+# Widgets a simulated user changes (label -> feature whose range it covers)
+INPUT_WIDGETS = {
+    "Satisfaction Slider": "satisfaction_level",
+    "Evaluation Slider": "last_evaluation",
+    "Years": "time_spend_company",
+    "Projects": "number_project",
+    "Hours": "average_monthly_hours"
+}
+PREDICT_BUTTON = "🔮 Predict Employee Turnover"
+
+# ============================================================================
+# SERVER PROCESS
+# ============================================================================
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, scratch_dir):
+    """Start the app through launch.py on ``port`` and wait for its health check
+
+    Its audit log goes to ``scratch_dir`` so load-test predictions never
+    reach the real one.
+    """
+    env = dict(os.environ, CHURN_AUDIT_DB=os.path.join(scratch_dir, "audit_log.sqlite"))
+    process = subprocess.Popen(
+        [sys.executable, "launch.py", "--server.port", str(port), "--server.headless", "true",
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"Server did not become healthy within {SERVER_START_TIMEOUT}s")
+
+
+def process_usage(pid):
+    """CPU seconds used and resident bytes of a process, from /proc (None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss_bytes": rss_pages * os.sysconf("SC_PAGE_SIZE")
+    }
+
+# ============================================================================
+# SIMULATED SESSIONS
+# ============================================================================
+class SimulatedSession:
+    """One browser tab talking to the app over Streamlit's websocket protocol
+
+    Each rerun sends the tab's widget values the way the frontend does and
+    waits for the server to report the script finished, so its latency is
+    what a user sees between an interaction and the finished page.
+    """
+
+    def __init__(self, url, seed):
+        self.url = url.rstrip("/").replace("http", "ws", 1) + "/_stcore/stream"
+        self.rng = random.Random(seed)
+        self.widgets = {}
+        self.values = {}
+        self.connection = None
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, max_message_size=1 << 30)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def _track_widgets(self, msg):
+        if msg.WhichOneof("type") != "delta" or msg.delta.WhichOneof("type") != "new_element":
+            return
+        element = msg.delta.new_element
+        kind = element.WhichOneof("type")
+        if kind in ("slider", "number_input", "button"):
+            widget = getattr(element, kind)
+            self.widgets[widget.label] = (kind, widget)
+
+    def _widget_states(self, trigger=None):
+        back_msg = BackMsg()
+        # The first rerun has no widget values, but the message must still say "rerun"
+        back_msg.rerun_script.SetInParent()
+        states = back_msg.rerun_script.widget_states
+        for label, value in self.values.items():
+            kind, widget = self.widgets[label]
+            state = states.widgets.add()
+            state.id = widget.id
+            if kind == "slider":
+                state.double_array_value.data.append(value)
+            elif widget.data_type == NumberInput.INT:
+                state.int_value = int(value)
+            else:
+                state.double_value = value
+        if trigger is not None:
+            state = states.widgets.add()
+            state.id = self.widgets[trigger][1].id
+            state.trigger_value = True
+        return back_msg
+
+    async def rerun(self, trigger=None):
+        """Send a rerun with the current widget values; return its latency in seconds"""
+        start = time.perf_counter()
+        await self.connection.write_message(self._widget_states(trigger).SerializeToString(), binary=True)
+        while True:
+            data = await asyncio.wait_for(self.connection.read_message(), RERUN_TIMEOUT_SECONDS)
+            if data is None:
+                raise ConnectionError("Server closed the session")
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            self._track_widgets(msg)
+            if msg.WhichOneof("type") == "script_finished":
+                return time.perf_counter() - start
+
+    def _random_input(self):
+        label = self.rng.choice(list(INPUT_WIDGETS))
+        low, high, step = FEATURE_RANGES[INPUT_WIDGETS[label]]
+        value = low + step * self.rng.randint(0, int(round((high - low) / step)))
+        self.values[label] = round(value, 2)
+
+    async def interact_until(self, deadline, think_time):
+        """Change an input, then press predict, until ``deadline``; return latencies by kind"""
+        latencies = {"input": [], "predict": []}
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.rng.expovariate(1 / think_time) if think_time > 0 else 0)
+            self._random_input()
+            latencies["input"].append(await self.rerun())
+            latencies["predict"].append(await self.rerun(trigger=PREDICT_BUTTON))
+        return latencies
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+def _percentiles_ms(samples):
+    if not samples:
+        return None
+    samples = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p90_ms": float(np.percentile(samples, 90)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "max_ms": float(samples.max())
+    }
+
+
+async def warm_up(url):
+    """Load the page once so the first level does not pay for the app's first run"""
+    session = SimulatedSession(url, seed=-1)
+    try:
+        await session.connect()
+        await session.rerun()
+        await session.rerun(trigger=PREDICT_BUTTON)
+    finally:
+        session.close()
+
+
+async def run_level(url, pid, n_sessions, duration, think_time, seed=0):
+    """Drive ``n_sessions`` concurrent users for ``duration`` seconds"""
+    baseline = process_usage(pid) if pid else None
+    sessions = [SimulatedSession(url, seed + index) for index in range(n_sessions)]
+    try:
+        await asyncio.gather(*(session.connect() for session in sessions))
+        page_loads = await asyncio.gather(*(session.rerun() for session in sessions))
+        before = process_usage(pid) if pid else None
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            session.interact_until(start + duration, think_time) for session in sessions
+        ))
+        elapsed = time.monotonic() - start
+        after = process_usage(pid) if pid else None
+    finally:
+        for session in sessions:
+            session.close()
+
+    reruns = {kind: [latency for result in results for latency in result[kind]] for kind in ("input", "predict")}
+    all_reruns = reruns["input"] + reruns["predict"]
+    level = {
+        "sessions": n_sessions,
+        "seconds": elapsed,
+        "reruns": len(all_reruns),
+        "reruns_per_second": len(all_reruns) / elapsed,
+        "page_load": _percentiles_ms(page_loads),
+        "rerun": _percentiles_ms(all_reruns),
+        "input_rerun": _percentiles_ms(reruns["input"]),
+        "predict_rerun": _percentiles_ms(reruns["predict"])
+    }
+    if before is not None and after is not None:
+        cpu_seconds = after["cpu_seconds"] - before["cpu_seconds"]
+        level.update({
+            "server_cpu_utilization": cpu_seconds / elapsed,
+            "cpu_cores_per_session": cpu_seconds / elapsed / n_sessions,
+            "cpu_ms_per_rerun": 1000 * cpu_seconds / max(len(all_reruns), 1),
+            "server_rss_bytes": after["rss_bytes"],
+            "rss_bytes_per_session": (after["rss_bytes"] - baseline["rss_bytes"]) / n_sessions
+        })
+    return level
+
+
+def find_saturation(levels, slo_ms=LATENCY_SLO_MS, share=SATURATION_THROUGHPUT_SHARE):
+    """Sessions at which throughput stops growing, and the most sessions within the latency SLO
+
+    The saturation point is the smallest level reaching ``share`` of the
+    best throughput measured; beyond it extra sessions mostly add queueing.
+    """
+    best = max(level["reruns_per_second"] for level in levels)
+    saturation = next(level["sessions"] for level in levels if level["reruns_per_second"] >= share * best)
+    within_slo = [level["sessions"] for level in levels if level["rerun"]["p95_ms"] <= slo_ms]
+    return {
+        "saturation_sessions": saturation,
+        "max_reruns_per_second": best,
+        "latency_slo_p95_ms": slo_ms,
+        "max_sessions_within_slo": max(within_slo) if within_slo else 0
+    }
+
+
+def run_load_test(url, pid, session_levels, duration, think_time, slo_ms=LATENCY_SLO_MS):
+    asyncio.run(warm_up(url))
+    levels = []
+    for n_sessions in session_levels:
+        level = asyncio.run(run_level(url, pid, n_sessions, duration, think_time))
+        levels.append(level)
+        cpu = (f", CPU {level['server_cpu_utilization']:.0%}, "
+               f"{level['rss_bytes_per_session'] / 2**20:+.1f} MB/session") if "server_cpu_utilization" in level else ""
+        print(f"  {n_sessions:>4} sessions: {level['reruns_per_second']:7.1f} reruns/s, "
+              f"p50 {level['rerun']['p50_ms']:7.0f} ms, p95 {level['rerun']['p95_ms']:7.0f} ms{cpu}")
+    return levels, find_saturation(levels, slo_ms)
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the Streamlit app with concurrent simulated users")
+    parser.add_argument("--url", help="Test a running app (default: start one through launch.py)")
+    parser.add_argument("--pid", type=int, help="Server process to sample CPU and memory from, with --url")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSION_LEVELS,
+                        help="Concurrent session counts to measure")
+    parser.add_argument("--duration", type=float, default=LEVEL_DURATION_SECONDS, help="Seconds per level")
+    parser.add_argument("--think-time", type=float, default=THINK_TIME_SECONDS,
+                        help="Mean seconds between a user's interactions (0 for back-to-back)")
+    parser.add_argument("--slo-ms", type=float, default=LATENCY_SLO_MS, help="p95 rerun latency target")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="churn-load-test-") as scratch_dir:
+        server = None
+        url, pid = args.url, args.pid
+        if url is None:
+            port = _free_port()
+            print(f"Starting the app on port {port}...")
+            server = start_server(port, scratch_dir)
+            url, pid = f"http://127.0.0.1:{port}", server.pid
+        try:
+            print("Running load levels...")
+            levels, summary = run_load_test(url, pid, args.sessions, args.duration, args.think_time, args.slo_ms)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "settings": {
+            "url": args.url or "launch.py",
+            "duration_seconds": args.duration,
+            "think_time_seconds": args.think_time,
+            "cpu_count": os.cpu_count()
+        },
+        "levels": levels,
+        "summary": summary
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Throughput saturates at {summary['saturation_sessions']} sessions "
+          f"({summary['max_reruns_per_second']:.1f} reruns/s); "
+          f"{summary['max_sessions_within_slo']} sessions stay within p95 {summary['latency_slo_p95_ms']:.0f} ms")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
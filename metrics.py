@@ -0,0 +1,253 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Set CHURN_METRICS=0 to turn every hook into a no-op
+METRICS_ENABLED = os.environ.get("CHURN_METRICS", "1") != "0"
+
+# Prometheus text and /ready endpoint (port 0 disables it). Loopback only by
+# default; a load balancer on another host needs CHURN_METRICS_HOST=0.0.0.0
+METRICS_HOST = os.environ.get("CHURN_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("CHURN_METRICS_PORT", "9464"))
+
+# Seconds between summary log lines (0 disables them)
+METRICS_LOG_INTERVAL = float(os.environ.get("CHURN_METRICS_LOG_INTERVAL", "60"))
+
+METRIC_PREFIX = "churn"
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = [0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+class MetricsRegistry:
+    """Process-wide counters, gauges and per-stage latency histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._stages = {}
+        self._collectors = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, stage, seconds):
+        """Record one timing of ``stage``"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {
+                    "count": 0, "sum": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1)
+                }
+            stats["count"] += 1
+            stats["sum"] += seconds
+            stats["buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def add_collector(self, name, collect):
+        """Register a callable returning ``{gauge_name: value}`` read at export time"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            stages = {stage: dict(stats, buckets=list(stats["buckets"]))
+                      for stage, stats in self._stages.items()}
+            collectors = dict(self._collectors)
+        for name, collect in collectors.items():
+            for key, value in collect().items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{name}_{key}"] = value
+        return counters, gauges, stages
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        counters, gauges, stages = self.snapshot()
+        lines = []
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE {METRIC_PREFIX}_{name} counter", f"{METRIC_PREFIX}_{name} {value}"]
+        typed = set()
+        for name, value in sorted(gauges.items()):
+            # Labelled gauges (name{label="..."}) share one TYPE line
+            base_name = name.split("{", 1)[0]
+            if base_name not in typed:
+                typed.add(base_name)
+                lines.append(f"# TYPE {METRIC_PREFIX}_{base_name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {value}")
+        if stages:
+            histogram = f"{METRIC_PREFIX}_stage_seconds"
+            lines.append(f"# TYPE {histogram} histogram")
+            for stage, stats in sorted(stages.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ["+Inf"], stats["buckets"]):
+                    cumulative += count
+                    lines.append(f'{histogram}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{histogram}_sum{{stage="{stage}"}} {stats["sum"]}')
+                lines.append(f'{histogram}_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def summary_line(self):
+        """One-line summary of counters, gauges and mean stage latencies"""
+        counters, gauges, stages = self.snapshot()
+        parts = [f"{name}={value:g}" for name, value in sorted({**counters, **gauges}.items())]
+        parts += [
+            f"{stage}={stats['sum'] / stats['count'] * 1000:.2f}ms(n={stats['count']})"
+            for stage, stats in sorted(stages.items())
+        ]
+        return " ".join(parts)
+
+
+REGISTRY = MetricsRegistry()
+
+# ============================================================================
+# HOOKS
+# ============================================================================
+class _Stopwatch:
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = time.perf_counter()
+
+    def stop(self):
+        REGISTRY.observe(self.stage, time.perf_counter() - self.start)
+
+
+class _NullStopwatch:
+    def stop(self):
+        pass
+
+
+_NULL_STOPWATCH = _NullStopwatch()
+
+
+@contextmanager
+def _timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """Context manager timing a block as ``stage`` (no-op when disabled)"""
+    return _timer(stage) if METRICS_ENABLED else nullcontext()
+
+
+def start_timer(stage):
+    """Start timing ``stage``; call ``.stop()`` on the result to record it"""
+    return _Stopwatch(stage) if METRICS_ENABLED else _NULL_STOPWATCH
+
+
+def inc(name, value=1):
+    if METRICS_ENABLED:
+        REGISTRY.inc(name, value)
+
+
+def set_gauge(name, value):
+    if METRICS_ENABLED:
+        REGISTRY.set_gauge(name, value)
+
+
+def add_collector(name, collect):
+    if METRICS_ENABLED:
+        REGISTRY.add_collector(name, collect)
+
+# ============================================================================
+# READINESS
+# ============================================================================
+_readiness_checks = {}
+
+
+def add_readiness_check(name, check):
+    """Register a callable returning a dict with a boolean ``ready`` key"""
+    _readiness_checks[name] = check
+
+
+def readiness():
+    """``(ready, details)``: ready only when every registered check is"""
+    details = {name: check() for name, check in list(_readiness_checks.items())}
+    ready = bool(details) and all(result["ready"] for result in details.values())
+    return ready, details
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics" and METRICS_ENABLED:
+            self._send(200, "text/plain; version=0.0.4", REGISTRY.render_prometheus())
+        elif self.path == "/ready":
+            # 503 until every readiness check passes, for load balancer probes
+            ready, details = readiness()
+            self._send(200 if ready else 503, "application/json", json.dumps({"ready": ready, **details}))
+        else:
+            self.send_error(404)
+
+    def _send(self, status, content_type, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _log_periodically(interval):
+    while True:
+        time.sleep(interval)
+        logger.info("metrics %s", REGISTRY.summary_line())
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_exporter(host=METRICS_HOST, port=METRICS_PORT, log_interval=METRICS_LOG_INTERVAL):
+    """Start the /metrics and /ready endpoint and periodic log line once per process
+
+    ``/ready`` is served even with ``CHURN_METRICS=0``, so turning the
+    hooks off never removes the load balancer's readiness probe.
+    """
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    if port:
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics endpoint not started on %s:%d: %s", host, port, e)
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+            logger.info("Metrics endpoint on http://%s:%d/metrics", host, port)
+
+    if log_interval > 0 and METRICS_ENABLED:
+        threading.Thread(
+            target=_log_periodically, args=(log_interval,), name="metrics-logger", daemon=True
+        ).start()
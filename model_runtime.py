@@ -0,0 +1,296 @@
+import argparse
+import logging
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import metrics
+from explain import ForestExplainer
+from forest_engine import CompiledForest
+from model_store import MODEL_STORE_DIR, has_store, load_model, read_manifest
+from scoring import BEST_FEATURES, FEATURE_RANGES, predict
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Rows in the dummy batch pushed through every inference path during warm-up
+WARMUP_ROWS = 1_000
+
+# Seconds between checks of the model store for a new version (0 disables)
+MODEL_WATCH_INTERVAL = float(os.environ.get("CHURN_MODEL_WATCH_INTERVAL", "30"))
+
+# Employees with the labels a new model is expected to reproduce before it is swapped in
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data", "golden_predictions.csv")
+GOLDEN_ROWS_PER_CLASS = 100
+
+# Share of golden labels a new model must match (retrains may flip a few borderline rows)
+GOLDEN_MIN_AGREEMENT = 0.95
+
+# ============================================================================
+# WARM-UP
+# ============================================================================
+def warmup_rows(n_rows=WARMUP_ROWS, seed=0):
+    """Synthetic employees spread over the app's input ranges"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for feature in BEST_FEATURES:
+        low, high, step = FEATURE_RANGES[feature]
+        n_steps = int(round((high - low) / step))
+        columns[feature] = low + step * rng.integers(0, n_steps + 1, n_rows)
+    return pd.DataFrame(columns)
+
+
+def warm_up(model, engine, explainer):
+    """Run a dummy batch and a single row through the bulk, single-row and explain paths
+
+    This faults in memory-mapped arrays and pays first-call costs (imports,
+    allocator growth, sklearn validation) before any user request does.
+    """
+    X = warmup_rows()
+    predict(model, X)
+    predict(engine, X)
+    single_row = X.iloc[:1]
+    predict(model, single_row)
+    predict(engine, single_row)
+    explainer.explain(single_row)
+
+
+class ActiveModel:
+    """A loaded model with its compiled engine, explainer and store info"""
+
+    def __init__(self, model, engine, explainer, info):
+        self.model = model
+        self.engine = engine
+        self.explainer = explainer
+        self.info = info
+        self.version = info["version"]
+
+    @property
+    def backend(self):
+        return self.info.get("backend", "sklearn")
+
+    @property
+    def predictor(self):
+        """What serves predictions: the ONNX session on the onnx backend, otherwise the compiled engine"""
+        return self.model if self.backend == "onnx" else self.engine
+
+
+def load_active_model(store_dir=MODEL_STORE_DIR):
+    """Load the model (local store first, then Hugging Face Hub), compile and warm it"""
+    model, engine, info = load_model(store_dir)
+    engine = engine if engine is not None else CompiledForest(model)
+    explainer = ForestExplainer(engine)
+    start = time.perf_counter()
+    warm_up(model, engine, explainer)
+    info["warmup_seconds"] = time.perf_counter() - start
+    return ActiveModel(model, engine, explainer, info)
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+def write_golden_set(model, path=GOLDEN_PATH, rows_per_class=GOLDEN_ROWS_PER_CLASS):
+    """Record ``model``'s predictions on held-out employees of both classes"""
+    # Imported here: train pulls in sklearn, which serving does not otherwise need
+    from train import RANDOM_STATE, load_training_data
+    _, X_test, _, y_test = load_training_data()
+    golden = pd.concat([
+        X_test[y_test == label].sample(min(rows_per_class, int((y_test == label).sum())),
+                                       random_state=RANDOM_STATE)
+        for label in (0, 1)
+    ])
+    predictions, proba = predict(model, golden)
+    golden = golden.assign(prediction=predictions, probability_leave=proba[:, 1])
+    golden.to_csv(path, index=False)
+    return golden
+
+
+def load_golden_set(path=GOLDEN_PATH):
+    """The golden employees and expected labels, or None when no file exists"""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path)
+
+
+def validate_model(active, golden=None, min_agreement=GOLDEN_MIN_AGREEMENT):
+    """Raise ValueError unless ``active`` takes BEST_FEATURES and reproduces the golden labels"""
+    for predictor in (active.model, active.engine):
+        names = getattr(predictor, "feature_names_in_", None)
+        if predictor.n_features_in_ != len(BEST_FEATURES) or (
+            names is not None and list(names) != BEST_FEATURES
+        ):
+            raise ValueError(f"Model does not take the features {BEST_FEATURES}")
+    if golden is None:
+        return
+    # The serving predictor (e.g. an ONNX export) and the engine behind explanations must both agree
+    predictors = [active.predictor] + ([active.engine] if active.engine is not active.predictor else [])
+    for predictor in predictors:
+        predictions, proba = predict(predictor, golden[BEST_FEATURES])
+        if not np.all(np.isfinite(proba)) or np.any(proba < 0) or np.any(proba > 1):
+            raise ValueError(f"{type(predictor).__name__} returned probabilities outside [0, 1]")
+        agreement = float(np.mean(predictions == golden["prediction"].to_numpy()))
+        if agreement < min_agreement:
+            raise ValueError(
+                f"{type(predictor).__name__} matches {agreement:.1%} of golden predictions "
+                f"(minimum {min_agreement:.0%})"
+            )
+
+# ============================================================================
+# MODEL RUNTIME
+# ============================================================================
+class ModelRuntime:
+    """Loads, warms and hot-swaps the model on background threads
+
+    ``ready`` only turns true once a dummy batch has gone through every
+    inference path, so a readiness probe never sends traffic to a cold
+    instance. Afterwards the local store is polled for new versions; each
+    one is loaded, warmed and validated off the request path and then
+    swapped in with a single reference assignment. Callers read ``active``
+    once per request and keep using that object, so in-flight predictions
+    finish on the model they started with.
+    """
+
+    def __init__(self, store_dir=MODEL_STORE_DIR, watch_interval=MODEL_WATCH_INTERVAL,
+                 golden=None):
+        self.store_dir = store_dir
+        self.watch_interval = watch_interval
+        self.golden = golden
+        self.active = None
+        self.error = None
+        self.rejected_version = None
+        self._finished = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+
+    def start(self):
+        """Start loading (and then watching the store) in the background, once"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="model-runtime", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        self._load()
+        if self.watch_interval <= 0:
+            return
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                self.check_for_update()
+            except Exception:
+                logger.exception("Model store check failed")
+
+    def check_for_update(self):
+        """Swap in the store's current version if it is new and valid; return whether it was"""
+        with self._swap_lock:
+            if not has_store(self.store_dir):
+                return False
+            version = read_manifest(self.store_dir)["version"]
+            active = self.active
+            if (active is not None and version == active.version) or version == self.rejected_version:
+                return False
+
+            start = time.perf_counter()
+            try:
+                candidate = load_active_model(self.store_dir)
+                validate_model(candidate, self.golden)
+            except Exception as e:
+                logger.warning("Rejected model version %s: %s", version, e)
+                self.rejected_version = version
+                metrics.inc("model_swap_failures_total")
+                return False
+
+            self.active = candidate
+            self.error = None
+            metrics.inc("model_swaps_total")
+            logger.info(
+                "Swapped model %s -> %s (loaded and validated in %.2fs)",
+                active.version if active is not None else None, candidate.version,
+                time.perf_counter() - start
+            )
+            return True
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            with metrics.timed("model_load"):
+                self.active = load_active_model(self.store_dir)
+        except Exception as e:
+            logger.exception("Model load failed")
+            self.error = e
+        else:
+            metrics.set_gauge("model_load_seconds", time.perf_counter() - start)
+            logger.info(
+                "Model %s ready in %.2fs (warm-up %.2fs)", self.active.version,
+                time.perf_counter() - start, self.active.info["warmup_seconds"]
+            )
+        finally:
+            self._finished.set()
+
+    @property
+    def ready(self):
+        return self.active is not None
+
+    def wait(self, timeout=None):
+        """Block until loading has finished; return whether the model is ready"""
+        self._finished.wait(timeout)
+        return self.ready
+
+    def status(self):
+        active = self.active
+        return {
+            "ready": active is not None,
+            "loading": not self._finished.is_set(),
+            "model_version": active.version if active is not None else None,
+            "warmup_seconds": active.info["warmup_seconds"] if active is not None else None,
+            "rejected_version": self.rejected_version,
+            "error": str(self.error) if self.error is not None else None
+        }
+
+    def gauges(self):
+        """Readiness plus an info gauge labelled with the active version"""
+        active = self.active
+        gauges = {"ready": int(active is not None)}
+        if active is not None:
+            gauges[f'info{{version="{active.version}"}}'] = 1
+        return gauges
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime(store_dir=MODEL_STORE_DIR):
+    """The process-wide runtime, started (and exposed at /ready) on first call"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = ModelRuntime(store_dir, golden=load_golden_set()).start()
+            metrics.add_readiness_check("model", _runtime.status)
+            metrics.add_collector("model", _runtime.gauges)
+        return _runtime
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the golden predictions used to validate new models")
+    parser.add_argument("--model", help="Joblib model file (default: local store, then Hugging Face Hub)")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    parser.add_argument("--output", default=GOLDEN_PATH, help="Golden predictions CSV")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model) if args.model else load_model(args.store)[0]
+    golden = write_golden_set(model, args.output)
+    print(f"Wrote {len(golden)} golden predictions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
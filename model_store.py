@@ -0,0 +1,291 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+import joblib
+
+from scoring import BEST_FEATURES
+from forest_engine import CompiledForest
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+HF_REPO_ID = os.environ.get("CHURN_HF_REPO_ID", "IamPradeep/Employee-Churn-Predictor")
+MODEL_FILENAME = os.environ.get("CHURN_MODEL_FILENAME", "final_random_forest_model.joblib")
+
+# Directory holding the manifest and model artifacts (override with env var)
+MODEL_STORE_DIR = os.environ.get(
+    "CHURN_MODEL_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_store")
+)
+MANIFEST_FILENAME = "manifest.json"
+
+# Memory-map numpy arrays read-only so workers share one physical copy
+DEFAULT_MMAP_MODE = "r"
+
+# "sklearn" unpickles the forest; "onnx" serves the version's ONNX export
+# with onnxruntime (see ``python model_store.py export-onnx``)
+INFERENCE_BACKENDS = ("sklearn", "onnx")
+INFERENCE_BACKEND = os.environ.get("CHURN_INFERENCE_BACKEND", "sklearn")
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+def file_sha256(path, block_size=1 << 20):
+    """Return the hex SHA-256 digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def current_rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _write_json_atomic(path, data):
+    """Write JSON to a temporary file and move it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+def has_store(store_dir=MODEL_STORE_DIR):
+    """True when the directory contains a model store manifest"""
+    return os.path.isfile(os.path.join(store_dir, MANIFEST_FILENAME))
+
+
+def read_manifest(store_dir=MODEL_STORE_DIR):
+    """Read the model store manifest"""
+    with open(os.path.join(store_dir, MANIFEST_FILENAME)) as f:
+        return json.load(f)
+
+# ============================================================================
+# PUBLISH
+# ============================================================================
+def _export_onnx(model, store_dir, version):
+    """Write and check the ONNX export of a version; return its manifest entries"""
+    from onnx_backend import OnnxForest, check_onnx_parity, export_onnx
+    onnx_file = f"model-{version}.onnx"
+    onnx_path = export_onnx(model, os.path.join(store_dir, onnx_file))
+    try:
+        max_diff = check_onnx_parity(model, OnnxForest(onnx_path))
+    except ValueError:
+        os.remove(onnx_path)
+        raise
+    return {"onnx_file": onnx_file, "onnx_sha256": file_sha256(onnx_path), "onnx_max_abs_diff": max_diff}
+
+
+def publish_model(model, store_dir=MODEL_STORE_DIR, version=None, features=BEST_FEATURES,
+                  metadata=None, onnx=False):
+    """Write a model (and its compiled engine) into the store and update the manifest
+
+    Artifacts are dumped uncompressed so they can be memory-mapped on load.
+    The manifest is replaced atomically once the artifacts are on disk.
+    ``metadata`` (e.g. a training report) is stored in the manifest as-is.
+    ``model`` may also be a :class:`CompiledForest` (such as a compacted
+    variant), which is published as an engine-only version. With ``onnx``
+    an ONNX export is written too, once it matches sklearn's probabilities.
+    """
+    model_features = getattr(model, "feature_names_in_", None)
+    if model_features is not None and list(model_features) != list(features):
+        raise ValueError(
+            f"Model features {list(model_features)} do not match {list(features)}"
+        )
+
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    os.makedirs(store_dir, exist_ok=True)
+
+    manifest = {"version": version, "created_at": datetime.now(timezone.utc).isoformat()}
+    if isinstance(model, CompiledForest):
+        engine = model
+    else:
+        engine = CompiledForest(model)
+        model_file = f"model-{version}.joblib"
+        joblib.dump(model, os.path.join(store_dir, model_file))
+        manifest["model_file"] = model_file
+        manifest["model_sha256"] = file_sha256(os.path.join(store_dir, model_file))
+        if onnx:
+            manifest.update(_export_onnx(model, store_dir, version))
+
+    engine_file = f"engine-{version}.joblib"
+    joblib.dump(engine, os.path.join(store_dir, engine_file))
+    manifest.update({
+        "engine_file": engine_file,
+        "engine_sha256": file_sha256(os.path.join(store_dir, engine_file)),
+        "features": list(features),
+        **(metadata or {})
+    })
+    _write_json_atomic(os.path.join(store_dir, MANIFEST_FILENAME), manifest)
+    return manifest
+
+
+def add_onnx_export(store_dir=MODEL_STORE_DIR):
+    """Export the current version to ONNX and record it in the manifest"""
+    model, _, _ = load_from_store(store_dir, backend="sklearn")
+    manifest = read_manifest(store_dir)
+    if not manifest.get("model_file"):
+        raise ValueError(f"Model version {manifest['version']} is engine-only and cannot be exported")
+    manifest.update(_export_onnx(model, store_dir, manifest["version"]))
+    _write_json_atomic(os.path.join(store_dir, MANIFEST_FILENAME), manifest)
+    return manifest
+
+# ============================================================================
+# LOAD
+# ============================================================================
+def _verified_path(store_dir, filename, expected_sha256, verify):
+    path = os.path.join(store_dir, filename)
+    if verify and file_sha256(path) != expected_sha256:
+        raise ValueError(f"Checksum mismatch for {path}")
+    return path
+
+
+def _load_artifact(store_dir, filename, expected_sha256, mmap_mode, verify):
+    """Verify an artifact's checksum and load it with joblib"""
+    return joblib.load(_verified_path(store_dir, filename, expected_sha256, verify), mmap_mode=mmap_mode)
+
+
+def load_from_store(store_dir=MODEL_STORE_DIR, mmap_mode=DEFAULT_MMAP_MODE, verify=True,
+                    backend=INFERENCE_BACKEND):
+    """Load the current model and compiled engine from the local store
+
+    Returns ``(model, engine, info)`` where ``info`` holds the manifest plus
+    ``load_seconds`` and ``rss_bytes`` measured after loading. ``engine`` is
+    None for stores published without one; engine-only versions return the
+    engine as ``model`` too. With the ``onnx`` backend, ``model`` is an
+    :class:`OnnxForest` and the sklearn pickle is never loaded.
+    """
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}; choose from {', '.join(INFERENCE_BACKENDS)}")
+    start = time.perf_counter()
+    manifest = read_manifest(store_dir)
+    if manifest["features"] != BEST_FEATURES:
+        raise ValueError(
+            f"Stored model features {manifest['features']} do not match {BEST_FEATURES}"
+        )
+
+    model = engine = None
+    if backend == "onnx":
+        # Imported here so the sklearn backend never loads onnxruntime
+        from onnx_backend import OnnxForest
+        if not manifest.get("onnx_file"):
+            raise ValueError(
+                f"Model version {manifest['version']} has no ONNX export "
+                "(run: python model_store.py export-onnx)"
+            )
+        model = OnnxForest(_verified_path(store_dir, manifest["onnx_file"], manifest["onnx_sha256"], verify))
+    elif manifest.get("model_file"):
+        model = _load_artifact(
+            store_dir, manifest["model_file"], manifest["model_sha256"], mmap_mode, verify
+        )
+    if manifest.get("engine_file"):
+        engine = _load_artifact(
+            store_dir, manifest["engine_file"], manifest["engine_sha256"], mmap_mode, verify
+        )
+    if model is None:
+        model = engine
+
+    info = dict(manifest)
+    if manifest.get("engine_file"):
+        # Worker pools memory-map this file instead of writing their own copy
+        info["engine_path"] = os.path.abspath(os.path.join(store_dir, manifest["engine_file"]))
+    info["backend"] = backend
+    info["load_seconds"] = time.perf_counter() - start
+    info["rss_bytes"] = current_rss_bytes()
+    logger.info(
+        "Loaded model %s (%s) from %s in %.3fs (RSS %.1f MB)",
+        manifest["version"], backend, store_dir, info["load_seconds"], info["rss_bytes"] / 2**20
+    )
+    return model, engine, info
+
+
+def download_from_huggingface(repo_id=HF_REPO_ID, filename=MODEL_FILENAME):
+    """Download the trained model from Hugging Face Hub and unpickle it"""
+    from huggingface_hub import hf_hub_download
+    model_path = hf_hub_download(repo_id=repo_id, filename=filename, repo_type="model")
+    return joblib.load(model_path)
+
+
+def load_model(store_dir=MODEL_STORE_DIR):
+    """Load from the local store when present, otherwise from Hugging Face Hub
+
+    Returns ``(model, engine, info)`` like :func:`load_from_store`; models
+    fetched from the Hub come without a precompiled engine.
+    """
+    if has_store(store_dir):
+        return load_from_store(store_dir)
+    if INFERENCE_BACKEND != "sklearn":
+        logger.warning("No local model store; serving the Hugging Face model with sklearn")
+    start = time.perf_counter()
+    model = download_from_huggingface()
+    info = {
+        "version": f"hf:{HF_REPO_ID}/{MODEL_FILENAME}",
+        "backend": "sklearn",
+        "load_seconds": time.perf_counter() - start,
+        "rss_bytes": current_rss_bytes()
+    }
+    return model, None, info
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local model store")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    publish_parser = subparsers.add_parser("publish", help="Add a joblib model to the store")
+    publish_parser.add_argument("model_path")
+    publish_parser.add_argument("--version")
+    publish_parser.add_argument("--onnx", action="store_true", help="Also write a checked ONNX export")
+
+    download_parser = subparsers.add_parser("download", help="Fetch the model from Hugging Face Hub")
+    download_parser.add_argument("--repo-id", default=HF_REPO_ID)
+    download_parser.add_argument("--filename", default=MODEL_FILENAME)
+    download_parser.add_argument("--version")
+
+    subparsers.add_parser("info", help="Load the current model and report timings")
+    subparsers.add_parser("export-onnx", help="Add an ONNX export to the current version")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "info":
+        _, _, info = load_from_store(args.store)
+        print(json.dumps(info, indent=2))
+        return
+
+    if args.command == "export-onnx":
+        print(json.dumps(add_onnx_export(args.store), indent=2))
+        return
+
+    if args.command == "download":
+        model = download_from_huggingface(args.repo_id, args.filename)
+    else:
+        model = joblib.load(args.model_path)
+
+    manifest = publish_model(model, args.store, version=args.version, onnx=getattr(args, "onnx", False))
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
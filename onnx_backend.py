@@ -0,0 +1,116 @@
+import argparse
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scoring import BEST_FEATURES, DATA_PATH, prepare_features
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Only needed to serve the ONNX backend
+    ort = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Maximum absolute difference tolerated against sklearn's predict_proba; the
+# runtime adds up the tree probabilities in float32
+ONNX_TOLERANCE = 1e-5
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+def export_onnx(model, path):
+    """Convert a fitted RandomForestClassifier to an ONNX file
+
+    Probabilities are exported as a plain tensor (no ZipMap), and the class
+    labels and feature names are stored in the model's metadata so the
+    runtime needs neither sklearn nor the pickle.
+    """
+    # Imported here: skl2onnx takes over a second to import and serving never needs it
+    try:
+        from skl2onnx import to_onnx
+    except ImportError as e:
+        raise ImportError("Exporting to ONNX needs skl2onnx: pip install skl2onnx") from e
+    onnx_model = to_onnx(
+        model,
+        np.zeros((1, len(BEST_FEATURES)), dtype=np.float32),
+        options={id(model): {"zipmap": False}}
+    )
+    for key, value in [("classes", model.classes_.tolist()), ("features", list(model.feature_names_in_))]:
+        entry = onnx_model.metadata_props.add()
+        entry.key, entry.value = key, json.dumps(value)
+    with open(path, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    return path
+
+# ============================================================================
+# RUNTIME BACKEND
+# ============================================================================
+class OnnxForest:
+    """CPU-only onnxruntime session with the predict_proba interface of the sklearn forest"""
+
+    def __init__(self, path):
+        if ort is None:
+            raise ImportError("The ONNX backend needs onnxruntime: pip install onnxruntime")
+        self.path = path
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.classes_ = np.array(json.loads(metadata["classes"]))
+        self.feature_names_in_ = np.array(json.loads(metadata["features"]), dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self._input_name = self.session.get_inputs()[0].name
+        self._output_name = next(
+            output.name for output in self.session.get_outputs() if output.name == "probabilities"
+        )
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = prepare_features(X)
+        X = np.asarray(X, dtype=np.float32)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def predict_proba(self, X):
+        proba = self.session.run([self._output_name], {self._input_name: self._as_array(X)})[0]
+        return proba.astype(np.float64)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def __getstate__(self):
+        # Sessions cannot be pickled; reopen from the file
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+# ============================================================================
+# PARITY CHECK
+# ============================================================================
+def check_onnx_parity(model, backend, data_path=DATA_PATH, tolerance=ONNX_TOLERANCE):
+    """Max absolute probability difference on the dataset; ValueError above ``tolerance``"""
+    X = prepare_features(pd.read_csv(data_path))
+    max_diff = float(np.max(np.abs(model.predict_proba(X) - backend.predict_proba(X))))
+    if max_diff > tolerance:
+        raise ValueError(f"ONNX probabilities differ from sklearn by {max_diff:.2e} (tolerance {tolerance:.0e})")
+    return max_diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a joblib forest to ONNX and check it against sklearn")
+    parser.add_argument("model_path", help="Joblib model file")
+    parser.add_argument("output", help="Where to write the .onnx file")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV the probabilities are compared on")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model_path)
+    export_onnx(model, args.output)
+    max_diff = check_onnx_parity(model, OnnxForest(args.output), args.data)
+    print(f"Wrote {args.output}; max probability difference vs sklearn {max_diff:.2e} "
+          f"(tolerance {ONNX_TOLERANCE:.0e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import math
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scoring import prepare_features
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Upper bound on rows handed to one worker task
+PARALLEL_CHUNK_SIZE = 50_000
+
+# Inputs below this size are scored in-process (pool overhead would dominate)
+MIN_PARALLEL_ROWS = 20_000
+
+# Shared input/output arrays live in RAM-backed /dev/shm where available
+SCRATCH_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Workers are started from a clean server process rather than forked from
+# the caller, which may be running server, metrics and writer threads
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+_worker_engine = None
+
+
+def _attach_engine(engine_path):
+    """Pool initializer: memory-map the shared compiled forest once per worker"""
+    global _worker_engine
+    _worker_engine = joblib.load(engine_path, mmap_mode="r")
+
+
+def _score_slice(input_path, output_path, start, stop):
+    """Score rows ``start:stop`` of the shared input into the shared output"""
+    X = np.load(input_path, mmap_mode="r")
+    proba = np.load(output_path, mmap_mode="r+")
+    proba[start:stop] = _worker_engine.predict_proba(X[start:stop])
+    proba.flush()
+    return stop - start
+
+# ============================================================================
+# PARALLEL SCORER
+# ============================================================================
+class ParallelScorer:
+    """Score large batches across a process pool sharing one compiled forest
+
+    The engine is written once (or taken from the model store) and every
+    worker memory-maps the same file, so its node arrays occupy physical
+    memory only once. Each batch is copied to a memory-mapped input array;
+    workers read their row ranges from it and write probabilities into a
+    shared output array at the same positions, so results come back in
+    input order without pickling rows or probabilities between processes.
+
+    Exposes ``predict_proba`` and ``classes_``, so it can be passed anywhere
+    a model is expected (e.g. ``scoring.score_frame``).
+    """
+
+    def __init__(self, engine, n_workers=None, chunk_size=PARALLEL_CHUNK_SIZE, engine_path=None):
+        self.engine = engine
+        self.classes_ = engine.classes_
+        self.n_features_in_ = engine.n_features_in_
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._scratch = tempfile.TemporaryDirectory(prefix="churn-scoring-", dir=SCRATCH_DIR)
+        if engine_path is None:
+            engine_path = os.path.join(self._scratch.name, "engine.joblib")
+            joblib.dump(engine, engine_path)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+            initializer=_attach_engine, initargs=(engine_path,)
+        )
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = prepare_features(X)
+        return np.asarray(X, dtype=np.float32)
+
+    def predict_proba(self, X):
+        """Class probabilities for every row, in input order"""
+        X = self._as_array(X)
+        n_rows = len(X)
+        if n_rows < MIN_PARALLEL_ROWS or self.n_workers == 1:
+            return self.engine.predict_proba(X)
+
+        batch_id = uuid.uuid4().hex
+        input_path = os.path.join(self._scratch.name, f"input-{batch_id}.npy")
+        output_path = os.path.join(self._scratch.name, f"output-{batch_id}.npy")
+        try:
+            shared_input = np.lib.format.open_memmap(input_path, "w+", np.float32, X.shape)
+            shared_input[:] = X
+            shared_input.flush()
+            del shared_input
+            np.lib.format.open_memmap(
+                output_path, "w+", np.float64, (n_rows, len(self.classes_))
+            ).flush()
+
+            # At least one task per worker, none larger than chunk_size
+            step = min(self.chunk_size, math.ceil(n_rows / self.n_workers))
+            futures = [
+                self._pool.submit(_score_slice, input_path, output_path, start, min(start + step, n_rows))
+                for start in range(0, n_rows, step)
+            ]
+            for future in futures:
+                future.result()
+            return np.array(np.load(output_path, mmap_mode="r"))
+        finally:
+            for path in (input_path, output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def close(self):
+        self._pool.shutdown()
+        self._scratch.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
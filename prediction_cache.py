@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Maximum number of distinct feature vectors kept
+DEFAULT_CACHE_SIZE = 100_000
+
+# ============================================================================
+# PREDICTION CACHE
+# ============================================================================
+class PredictionCache:
+    """Bounded LRU cache of class probabilities keyed by the feature vector
+
+    Keys are the raw bytes of each row cast to float32, in ``BEST_FEATURES``
+    order. That is exactly the precision the forest compares at, so a hit
+    always returns the probabilities the model would have produced. Only
+    probabilities are cached; labels are derived by the caller so the
+    decision threshold can change without invalidating entries.
+
+    Entries belong to the model last passed to ``bind_model``. A predictor
+    that is not bound (e.g. one a rerun picked up before a hot swap) is
+    scored directly and never reads or fills the cache.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self._predictors = ()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def bind_model(self, model, *predictors):
+        """Attach the cache to a model and its equivalent predictors (e.g. its engine), clearing it on change"""
+        with self._lock:
+            if model is not self._model:
+                self._model = model
+                self._reset()
+            self._predictors = (model, *predictors)
+
+    def _is_bound(self, predictor):
+        return self._model is None or any(predictor is bound for bound in self._predictors)
+
+    def _reset(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate
+        }
+
+    def predict_proba(self, predictor, X):
+        """Return class probabilities, running the forest only for unseen rows
+
+        Duplicate rows within ``X`` are scored once; rows already cached are
+        not scored at all.
+        """
+        if isinstance(X, pd.DataFrame):
+            values = X.to_numpy(dtype=np.float32)
+        else:
+            values = np.asarray(X, dtype=np.float32)
+        if len(values) == 0:
+            return predictor.predict_proba(X)
+        with self._lock:
+            bound = self._is_bound(predictor)
+        if not bound:
+            return predictor.predict_proba(X)
+        values = np.ascontiguousarray(values.reshape(len(values), -1))
+
+        row_dtype = np.dtype((np.void, values.dtype.itemsize * values.shape[1]))
+        row_keys = values.view(row_dtype).ravel()
+        unique_rows, first_index, inverse = np.unique(
+            row_keys, return_index=True, return_inverse=True
+        )
+        unique_keys = [row.tobytes() for row in unique_rows]
+
+        unique_proba = [None] * len(unique_keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(unique_keys):
+                cached = self._entries.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    unique_proba[i] = cached
+
+        if missing:
+            rows = first_index[missing]
+            subset = X.iloc[rows] if isinstance(X, pd.DataFrame) else np.asarray(X)[rows]
+            scored = predictor.predict_proba(subset)
+            with self._lock:
+                # A model bound while scoring must not receive these probabilities
+                keep = self._is_bound(predictor)
+                for i, proba in zip(missing, scored):
+                    unique_proba[i] = tuple(proba)
+                    if keep:
+                        self._entries[unique_keys[i]] = unique_proba[i]
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(values) - len(missing)
+        return np.array(unique_proba, dtype=np.float64)[inverse.ravel()]
@@ -0,0 +1,217 @@
+import argparse
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from model_store import MODEL_STORE_DIR, load_model
+from scoring import BEST_FEATURES, COLUMN_ALIASES, DATA_PATH, DEFAULT_THRESHOLD, predict
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Columns the workforce is rolled up by
+ROLLUP_DIMENSIONS = ["Department", "salary"]
+
+# Column identifying employees across exports; without it rows are matched by position
+EMPLOYEE_ID_COLUMN = os.environ.get("CHURN_EMPLOYEE_ID_COLUMN", "employee_id")
+
+# Probabilities are binned to this resolution for incremental percentiles
+RISK_RESOLUTION = 1_000
+
+# Percentiles of the probability of leaving reported for every group
+RISK_PERCENTILES = [50, 75, 90]
+
+# ============================================================================
+# GROUP AGGREGATES
+# ============================================================================
+class _GroupStats:
+    """Additive per-group aggregates for one dimension
+
+    Headcount, summed probability (expected leavers), predicted leavers and
+    a histogram of probabilities at ``1 / RISK_RESOLUTION`` resolution are
+    all sums over rows, so a changed row is applied by subtracting its old
+    contribution and adding its new one. Group-bys are a few bincounts.
+    """
+
+    def __init__(self):
+        self.labels = []
+        self._codes = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.risk_sum = np.zeros(0)
+        self.leavers = np.zeros(0, dtype=np.int64)
+        self.histogram = np.zeros((0, RISK_RESOLUTION + 1), dtype=np.int64)
+
+    def _encode(self, values):
+        """Integer code per group value, growing the arrays for new groups"""
+        for value in pd.unique(values):
+            if value not in self._codes:
+                self._codes[value] = len(self.labels)
+                self.labels.append(value)
+        n_groups = len(self.labels)
+        if n_groups > len(self.count):
+            grow = n_groups - len(self.count)
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self.risk_sum = np.concatenate([self.risk_sum, np.zeros(grow)])
+            self.leavers = np.concatenate([self.leavers, np.zeros(grow, dtype=np.int64)])
+            self.histogram = np.vstack([
+                self.histogram, np.zeros((grow, RISK_RESOLUTION + 1), dtype=np.int64)
+            ])
+        return np.array([self._codes[value] for value in values], dtype=np.intp)
+
+    def add(self, values, proba_leave, predictions, sign=1):
+        """Add (``sign=1``) or remove (``sign=-1``) rows' contributions"""
+        if not len(values):
+            return
+        codes = self._encode(np.asarray(values))
+        n_groups = len(self.labels)
+        risk_bins = np.rint(np.asarray(proba_leave) * RISK_RESOLUTION).astype(np.intp)
+        self.count += sign * np.bincount(codes, minlength=n_groups)
+        self.risk_sum += sign * np.bincount(codes, weights=proba_leave, minlength=n_groups)
+        self.leavers += sign * np.bincount(codes, weights=predictions, minlength=n_groups).astype(np.int64)
+        self.histogram += sign * np.bincount(
+            codes * (RISK_RESOLUTION + 1) + risk_bins, minlength=n_groups * (RISK_RESOLUTION + 1)
+        ).reshape(n_groups, RISK_RESOLUTION + 1)
+
+    def table(self, name):
+        """One row per non-empty group, most expected leavers first"""
+        present = self.count > 0
+        count = self.count[present]
+        table = pd.DataFrame({
+            "employees": count,
+            "expected_leavers": self.risk_sum[present],
+            "predicted_leavers": self.leavers[present],
+            "mean_risk": self.risk_sum[present] / count
+        }, index=pd.Index(np.array(self.labels, dtype=object)[present], name=name))
+        cumulative = self.histogram[present].cumsum(axis=1)
+        for percentile in RISK_PERCENTILES:
+            # Smallest binned probability with at least this share of the group at or below it
+            reached = cumulative >= np.ceil(count * percentile / 100)[:, None]
+            table[f"p{percentile}_risk"] = reached.argmax(axis=1) / RISK_RESOLUTION
+        return table.sort_values("expected_leavers", ascending=False)
+
+# ============================================================================
+# WORKFORCE ROLLUP
+# ============================================================================
+class WorkforceRollup:
+    """Department and salary risk rollups kept current as employee records change
+
+    ``sync`` compares a workforce snapshot with the rows already scored and
+    only re-scores employees that are new or whose inputs changed; the group
+    aggregates are then updated by those rows' differences. Employees are
+    matched on ``id_column`` when the snapshot has it. Otherwise the
+    snapshot's index is used, which for a CSV is the row position: that is
+    only a fallback, since inserting or deleting one row shifts every row
+    after it and re-scores them all.
+    """
+
+    def __init__(self, model, threshold=DEFAULT_THRESHOLD, dimensions=ROLLUP_DIMENSIONS,
+                 id_column=EMPLOYEE_ID_COLUMN):
+        self.model = model
+        self.threshold = threshold
+        self.dimensions = list(dimensions)
+        self.id_column = id_column
+        self.input_columns = BEST_FEATURES + self.dimensions
+        self.records = pd.DataFrame(columns=self.input_columns + ["probability_leave", "prediction"])
+        self.rows_scored = 0
+        self._stats = {dimension: _GroupStats() for dimension in self.dimensions}
+        self._source = None
+        self._lock = threading.Lock()
+
+    def _prepare(self, df):
+        df = df.rename(columns=COLUMN_ALIASES, copy=False)
+        if self.id_column and self.id_column in df.columns:
+            if df[self.id_column].duplicated().any():
+                raise ValueError(f"Column {self.id_column} has duplicate employee ids")
+            df = df.set_index(self.id_column)
+        missing = [column for column in self.input_columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        df = df[self.input_columns]
+        return df.assign(**{dimension: df[dimension].fillna("unknown") for dimension in self.dimensions})
+
+    def _apply(self, rows, sign):
+        for dimension, stats in self._stats.items():
+            stats.add(rows[dimension].to_numpy(), rows["probability_leave"].to_numpy(),
+                      rows["prediction"].to_numpy(), sign)
+
+    def sync(self, df):
+        """Bring the rollups in line with a workforce snapshot
+
+        Returns the number of rows re-scored and removed, and the re-scored
+        rows themselves (inputs, ``probability_leave`` and ``prediction``)
+        under ``"rows"``.
+        """
+        df = self._prepare(df)
+        with self._lock:
+            known = self.records.index
+            removed = known.difference(df.index)
+            common = df.index.intersection(known)
+            changed = (
+                df.loc[common].ne(self.records.loc[common, self.input_columns]).any(axis=1)
+                if len(common) else pd.Series(False, index=common)
+            )
+            to_score = df.loc[common[changed.to_numpy()].append(df.index.difference(known))]
+
+            stale = self.records.loc[removed.append(to_score.index.intersection(known))]
+            self._apply(stale, -1)
+            if len(to_score):
+                predictions, proba = predict(self.model, to_score[BEST_FEATURES], self.threshold)
+                to_score = to_score.assign(probability_leave=proba[:, 1], prediction=predictions)
+                self._apply(to_score, 1)
+                self.rows_scored += len(to_score)
+            kept = self.records.drop(stale.index)
+            self.records = pd.concat([kept, to_score]) if len(kept) else to_score
+            rows = to_score if len(to_score) else self.records.iloc[:0]
+            return {"scored": len(to_score), "removed": len(removed), "rows": rows}
+
+    def sync_csv(self, path):
+        """Sync from a CSV export, skipping the read when the file is unchanged"""
+        stat = os.stat(path)
+        source = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if source == self._source:
+            return {"scored": 0, "removed": 0, "rows": self.records.iloc[:0]}
+        result = self.sync(pd.read_csv(path))
+        self._source = source
+        return result
+
+    def table(self, dimension):
+        """Employees, expected and predicted leavers, mean risk and risk percentiles per group"""
+        with self._lock:
+            return self._stats[dimension].table(dimension)
+
+    def totals(self):
+        with self._lock:
+            proba = self.records["probability_leave"].to_numpy(dtype=float)
+            return {
+                "employees": len(proba),
+                "expected_leavers": float(proba.sum()),
+                "predicted_leavers": int(self.records["prediction"].sum()),
+                "mean_risk": float(proba.mean()) if len(proba) else 0.0
+            }
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roll up turnover risk by department and salary band")
+    parser.add_argument("input", nargs="?", default=DATA_PATH, help="Workforce CSV export")
+    parser.add_argument("--model", help="Joblib model file (default: local store, then Hugging Face Hub)")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    parser.add_argument("--id-column", default=EMPLOYEE_ID_COLUMN,
+                        help="Employee id column (rows are matched by position without it)")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model) if args.model else load_model(args.store)[0]
+    rollup = WorkforceRollup(model, id_column=args.id_column)
+    rollup.sync_csv(args.input)
+    pd.set_option("display.width", 160)
+    for dimension in rollup.dimensions:
+        print(rollup.table(dimension).round(3), end="\n\n")
+    print(rollup.totals())
+
+
+if __name__ == "__main__":
+    main()
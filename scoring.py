@@ -0,0 +1,128 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# Bundled training data, also the default workforce, drift and parity dataset
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data", "HR_comma_sep.csv")
+
+# Define the 5 selected features (in exact order)
+BEST_FEATURES = [
+    "satisfaction_level",
+    "time_spend_company",
+    "average_monthly_hours",
+    "number_project",
+    "last_evaluation"
+]
+
+# (min, max, step) of each input widget in app.py
+FEATURE_RANGES = {
+    "satisfaction_level": (0.0, 1.0, 0.01),
+    "time_spend_company": (1, 40, 1),
+    "average_monthly_hours": (80, 350, 5),
+    "number_project": (1, 10, 1),
+    "last_evaluation": (0.0, 1.0, 0.01)
+}
+
+# HRIS exports (and Data/HR_comma_sep.csv) use the original misspelled column
+COLUMN_ALIASES = {
+    "average_montly_hours": "average_monthly_hours"
+}
+
+# Rows passed to the forest per predict_proba call in batch mode
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Probability of leaving above which an employee is labelled LEAVE
+DEFAULT_THRESHOLD = 0.5
+
+# ============================================================================
+# FEATURE PREPARATION
+# ============================================================================
+def prepare_features(df):
+    """Map known column aliases and return the model features in order"""
+    df = df.rename(columns=COLUMN_ALIASES, copy=False)
+    missing = [feature for feature in BEST_FEATURES if feature not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return df[BEST_FEATURES]
+
+
+def records_to_array(records):
+    """Convert dict records (e.g. parsed JSON) to a float matrix in feature order"""
+    aliases = {feature: alias for alias, feature in COLUMN_ALIASES.items()}
+    rows = []
+    for index, record in enumerate(records):
+        try:
+            rows.append([
+                float(record[feature] if feature in record else record[aliases[feature]])
+                for feature in BEST_FEATURES
+            ])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(
+                f"Record {index} must contain numeric values for: {', '.join(BEST_FEATURES)}"
+            ) from e
+    values = np.array(rows, dtype=np.float64).reshape(len(rows), len(BEST_FEATURES))
+    # float() accepts "NaN" and "Infinity", which the forest cannot score
+    bad_rows = np.flatnonzero(~np.isfinite(values).all(axis=1))
+    if len(bad_rows):
+        raise ValueError(f"Record {bad_rows[0]} contains a non-finite value (NaN or infinity)")
+    return values
+
+# ============================================================================
+# INFERENCE
+# ============================================================================
+def predict(model, features, threshold=DEFAULT_THRESHOLD, cache=None):
+    """Run the forest once and derive labels and class probabilities from it
+
+    An employee is labelled 1 (LEAVE) when the probability of leaving is
+    strictly greater than ``threshold``; at 0.5 this matches
+    ``model.predict``. Returns ``(predictions, probabilities)`` where
+    probabilities has one column per class (stay, leave). With a
+    ``PredictionCache``, previously seen and duplicate rows skip the forest.
+    """
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"Decision threshold must be between 0 and 1, got {threshold}")
+    if cache is not None:
+        proba = cache.predict_proba(model, features)
+    else:
+        proba = model.predict_proba(features)
+    predictions = (proba[:, 1] > threshold).astype(int)
+    return predictions, proba
+
+# ============================================================================
+# BATCH SCORING
+# ============================================================================
+def score_frame(model, df, chunk_size=DEFAULT_CHUNK_SIZE, threshold=DEFAULT_THRESHOLD, cache=None):
+    """Score every row of a DataFrame with one forest call per chunk
+
+    Returns a DataFrame with ``row_id``, ``probability_leave`` and
+    ``prediction`` columns, plus the elapsed scoring time in seconds.
+    """
+    features = prepare_features(df)
+    # Validated here so every backend (sklearn, engine, worker pool) rejects the same files
+    bad_rows = np.flatnonzero(~np.isfinite(features.to_numpy(dtype=np.float64)).all(axis=1))
+    if len(bad_rows):
+        raise ValueError(
+            f"{len(bad_rows)} rows contain missing or non-finite values (first: row {df.index[bad_rows[0]]})"
+        )
+    n_rows = len(features)
+    predictions = np.empty(n_rows, dtype=int)
+    proba_leave = np.empty(n_rows)
+
+    start = time.perf_counter()
+    for offset in range(0, n_rows, chunk_size):
+        chunk = features.iloc[offset:offset + chunk_size]
+        chunk_predictions, chunk_proba = predict(model, chunk, threshold, cache)
+        predictions[offset:offset + len(chunk)] = chunk_predictions
+        proba_leave[offset:offset + len(chunk)] = chunk_proba[:, 1]
+    elapsed = time.perf_counter() - start
+
+    results = pd.DataFrame({
+        "row_id": df.index,
+        "probability_leave": proba_leave,
+        "prediction": predictions
+    })
+    return results, elapsed
@@ -0,0 +1,355 @@
+import argparse
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from drift import DriftMonitor
+from model_runtime import load_active_model
+from model_store import MODEL_STORE_DIR
+from prediction_cache import PredictionCache
+from scoring import DATA_PATH, DEFAULT_THRESHOLD, predict, prepare_features, records_to_array
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+
+# Micro-batching: flush when this many rows are queued or the wait expires
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 2.0
+
+# Number of recent requests kept for latency percentiles
+LATENCY_WINDOW = 10_000
+
+# ============================================================================
+# MICRO-BATCHING
+# ============================================================================
+class MicroBatcher:
+    """Collect concurrent scoring requests into one forest call
+
+    Each submitted matrix is queued with a Future. A single worker thread
+    takes the first waiting request, keeps collecting until
+    ``max_batch_size`` rows are queued or ``max_wait_ms`` has passed, scores
+    the stacked rows once and hands every caller its own slice. Scored rows
+    are added to ``monitor`` (a ``DriftMonitor``) once per micro-batch.
+    """
+
+    def __init__(self, predictor, threshold=DEFAULT_THRESHOLD,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 cache=None, monitor=None):
+        self.predictor = predictor
+        self.threshold = threshold
+        self.cache = cache
+        self.monitor = monitor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, X):
+        """Queue a feature matrix for scoring and return a Future"""
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def close(self):
+        """Stop the worker once already queued requests are scored"""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        """Gather queued requests behind ``first`` until size or time runs out"""
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        stop = False
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch, stop
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            self._score(batch)
+            if stop:
+                return
+
+    def _score(self, batch):
+        """Score one micro-batch and resolve the callers' futures"""
+        try:
+            X = np.concatenate([X for X, _ in batch])
+            predictions, proba = predict(self.predictor, X, self.threshold, self.cache)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batch_sizes.append(len(X))
+        if self.monitor is not None:
+            self.monitor.update(X)
+        offset = 0
+        for X, future in batch:
+            future.set_result((predictions[offset:offset + len(X)], proba[offset:offset + len(X)]))
+            offset += len(X)
+
+# ============================================================================
+# SERVICE METRICS
+# ============================================================================
+class ServiceMetrics:
+    """Thread-safe request latency and throughput counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started_at = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+
+    def record(self, latency_seconds, n_rows):
+        with self._lock:
+            self._latencies.append(latency_seconds)
+            self.requests += 1
+            self.rows += n_rows
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self, batch_sizes=()):
+        """Return latency percentiles (ms) and throughput since start"""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            requests, rows, errors = self.requests, self.rows, self.errors
+        uptime = time.time() - self.started_at
+        has_latencies = len(latencies) > 0
+        return {
+            "uptime_seconds": uptime,
+            "requests": requests,
+            "rows": rows,
+            "errors": errors,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if has_latencies else None,
+            "latency_p99_ms": float(np.percentile(latencies, 99)) if has_latencies else None,
+            "requests_per_second": requests / uptime if uptime > 0 else 0.0,
+            "rows_per_second": rows / uptime if uptime > 0 else 0.0,
+            "mean_batch_rows": float(np.mean(batch_sizes)) if len(batch_sizes) else None
+        }
+
+# ============================================================================
+# HTTP SERVICE
+# ============================================================================
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """JSON scoring API
+
+    ``POST /predict`` accepts one record object, a list of records or
+    ``{"records": [...]}``. ``GET /metrics``, ``GET /health`` and
+    ``GET /ready`` report service state; ``GET /drift`` compares inputs so
+    far with the training distribution.
+    """
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "model_version": self.server.model_version})
+        elif self.path == "/ready":
+            # The server only listens once the model is loaded and warmed up
+            self._send_json(200, {"ready": True, "model_version": self.server.model_version})
+        elif self.path == "/metrics":
+            snapshot = self.server.metrics.snapshot(list(self.server.batcher.batch_sizes))
+            snapshot["model_version"] = self.server.model_version
+            if self.server.batcher.cache is not None:
+                snapshot["cache"] = self.server.batcher.cache.stats()
+            self._send_json(200, snapshot)
+        elif self.path == "/drift":
+            self._send_json(200, self.server.batcher.monitor.report())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+            single = isinstance(payload, dict) and "records" not in payload
+            if single:
+                records = [payload]
+            elif isinstance(payload, dict):
+                records = payload["records"]
+            else:
+                records = payload
+            if not isinstance(records, list):
+                raise ValueError("Expected a record object, a list of records or {\"records\": [...]}")
+            X = records_to_array(records)
+        except (ValueError, json.JSONDecodeError) as e:
+            self.server.metrics.record_error()
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            predictions, proba = self.server.batcher.submit(X).result()
+        except Exception as e:
+            logger.exception("Scoring failed")
+            self.server.metrics.record_error()
+            self._send_json(500, {"error": str(e)})
+            return
+
+        results = [
+            {
+                "prediction": int(label),
+                "probability_stay": float(p[0]),
+                "probability_leave": float(p[1])
+            }
+            for label, p in zip(predictions, proba)
+        ]
+        body = results[0] if single else {"results": results}
+        self._send_json(200, body)
+        self.server.metrics.record(time.perf_counter() - start, len(X))
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for bursty clients"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, store_dir=MODEL_STORE_DIR,
+                  threshold=DEFAULT_THRESHOLD, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                  max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """Load and warm up the model, then build a threaded HTTP scoring server"""
+    active = load_active_model(store_dir)
+    server = ScoringServer((host, port), ScoringRequestHandler)
+    server.model_version = active.version
+    server.metrics = ServiceMetrics()
+    cache = PredictionCache()
+    cache.bind_model(active.model, active.engine)
+    server.batcher = MicroBatcher(
+        active.predictor, threshold, max_batch_size, max_wait_ms, cache, DriftMonitor.from_reference()
+    )
+    return server
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+def run_load_test(url, n_requests=2000, concurrency=16, batch_size=1,
+                  data_path=DATA_PATH):
+    """Fire concurrent /predict requests at a running service and summarize"""
+    records = prepare_features(pd.read_csv(data_path)).to_dict("records")
+
+    def send_one(_):
+        sample = random.sample(records, batch_size)
+        body = json.dumps(sample[0] if batch_size == 1 else {"records": sample}).encode("utf-8")
+        request = urllib.request.Request(
+            f"{url}/predict", data=body, headers={"Content-Type": "application/json"}
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(send_one, range(n_requests)))) * 1000
+    elapsed = time.perf_counter() - start
+
+    with urllib.request.urlopen(f"{url}/metrics") as response:
+        server_metrics = json.loads(response.read())
+
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "elapsed_seconds": elapsed,
+        "client_p50_ms": float(np.percentile(latencies, 50)),
+        "client_p99_ms": float(np.percentile(latencies, 99)),
+        "requests_per_second": n_requests / elapsed,
+        "rows_per_second": n_requests * batch_size / elapsed,
+        "server": server_metrics
+    }
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless employee turnover scoring service")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the HTTP scoring service")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    serve_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    serve_parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    serve_parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+
+    load_parser = subparsers.add_parser("loadtest", help="Load-test a running service")
+    load_parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    load_parser.add_argument("--requests", type=int, default=2000)
+    load_parser.add_argument("--concurrency", type=int, default=16)
+    load_parser.add_argument("--batch-size", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    if args.command == "loadtest":
+        report = run_load_test(args.url, args.requests, args.concurrency, args.batch_size)
+        print(json.dumps(report, indent=2))
+        return
+
+    server = create_server(
+        args.host, args.port, args.store, args.threshold, args.max_batch_size, args.max_wait_ms
+    )
+    logger.info("Scoring service listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
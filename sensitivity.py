@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from scoring import BEST_FEATURES, FEATURE_RANGES, predict
+
+# ============================================================================
+# SWEEP GRIDS
+# ============================================================================
+def feature_grid(feature):
+    """All values a feature can take in the app's input widgets"""
+    low, high, step = FEATURE_RANGES[feature]
+    n_steps = int(round((high - low) / step))
+    values = low + step * np.arange(n_steps + 1)
+    # Round away float drift so grid points match what the widgets produce
+    return np.round(values, 2)
+
+# ============================================================================
+# SENSITIVITY SWEEP
+# ============================================================================
+def sensitivity_sweep(predictor, base_record, x_feature, y_feature=None, cache=None):
+    """Score one employee with one or two features swept over their full range
+
+    Every sweep point is scored in a single batched forest call. Returns a
+    long-form DataFrame with a column per swept feature plus
+    ``probability_leave``.
+    """
+    if y_feature == x_feature:
+        raise ValueError("Choose two different features for a two-way sweep")
+
+    x_values = feature_grid(x_feature)
+    if y_feature is None:
+        grid = {x_feature: x_values}
+    else:
+        xx, yy = np.meshgrid(x_values, feature_grid(y_feature))
+        grid = {x_feature: xx.ravel(), y_feature: yy.ravel()}
+
+    n_points = len(next(iter(grid.values())))
+    points = pd.DataFrame({
+        feature: grid[feature] if feature in grid else np.full(n_points, float(base_record[feature]))
+        for feature in BEST_FEATURES
+    })
+    _, proba = predict(predictor, points, cache=cache)
+
+    sweep = points[list(grid)].copy()
+    sweep["probability_leave"] = proba[:, 1]
+    return sweep
@@ -0,0 +1,295 @@
+import argparse
+import heapq
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from drift import DriftMonitor
+from model_store import MODEL_STORE_DIR, current_rss_bytes, load_model
+from scoring import BEST_FEATURES, COLUMN_ALIASES, DEFAULT_CHUNK_SIZE, DEFAULT_THRESHOLD, predict
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pa = pq = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# The forest compares features as float32, so this downcast never changes a prediction
+FEATURE_DTYPE = np.float32
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+RESULT_COLUMNS = ["row_id", "probability_leave", "prediction"]
+
+# Employees returned by a top-K ranking unless --top-k says otherwise
+DEFAULT_TOP_K = 200
+
+# Columns top-K rankings can be filtered by (and report when the export has them)
+FILTER_COLUMNS = ["Department", "salary"]
+
+# ============================================================================
+# INPUT
+# ============================================================================
+def _is_parquet(path):
+    return str(path).lower().endswith(PARQUET_SUFFIXES)
+
+
+def _require_parquet():
+    if pq is None:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow")
+
+
+def resolve_source_columns(columns):
+    """Name of the input column holding each model feature, in feature order"""
+    available = set(columns)
+    aliases = {feature: alias for alias, feature in COLUMN_ALIASES.items()}
+    source_columns, missing = [], []
+    for feature in BEST_FEATURES:
+        if feature in available:
+            source_columns.append(feature)
+        elif aliases.get(feature) in available:
+            source_columns.append(aliases[feature])
+        else:
+            missing.append(feature)
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return source_columns
+
+
+def read_columns(path):
+    """Column names of a CSV or Parquet export, without reading its rows"""
+    if _is_parquet(path):
+        _require_parquet()
+        return pq.ParquetFile(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_feature_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, extra_columns=()):
+    """Yield the model features of a CSV or Parquet export, ``chunk_size`` rows at a time
+
+    Only the 5 feature columns are parsed, directly as float32. Aliased
+    columns (``average_montly_hours``) are mapped by relabelling the chunk,
+    without copying its data. ``extra_columns`` are read as-is and follow
+    the features in each chunk.
+    """
+    columns = read_columns(path)
+    source_columns = resolve_source_columns(columns)
+    extra_columns = list(extra_columns)
+    missing = [column for column in extra_columns if column not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    if _is_parquet(path):
+        chunks = (
+            batch.to_pandas()
+            for batch in pq.ParquetFile(path).iter_batches(
+                batch_size=chunk_size, columns=source_columns + extra_columns
+            )
+        )
+    else:
+        chunks = pd.read_csv(
+            path,
+            usecols=source_columns + extra_columns,
+            dtype=dict.fromkeys(source_columns, FEATURE_DTYPE),
+            chunksize=chunk_size
+        )
+
+    for chunk in chunks:
+        features = chunk[source_columns + extra_columns].astype(
+            dict.fromkeys(source_columns, FEATURE_DTYPE), copy=False
+        )
+        yield features.set_axis(BEST_FEATURES + extra_columns, axis=1, copy=False)
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+class _CsvSink:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.file.write(",".join(RESULT_COLUMNS) + "\n")
+
+    def write(self, results):
+        results.to_csv(self.file, header=False, index=False)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.schema = pa.schema([
+            ("row_id", pa.int64()), ("probability_leave", pa.float64()), ("prediction", pa.int64())
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, results):
+        self.writer.write_table(pa.Table.from_pandas(results, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+# ============================================================================
+# STREAMING SCORER
+# ============================================================================
+def score_stream(model, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                 threshold=DEFAULT_THRESHOLD, monitor=None):
+    """Score an export chunk by chunk, appending results to ``output_path``
+
+    At most one chunk of features and results is held at a time, so memory
+    stays flat as the input grows. Results (``row_id``, ``probability_leave``,
+    ``prediction``) are written to a temporary file that replaces
+    ``output_path`` once every row has been scored. Returns a summary with
+    row count, timings and the peak RSS sampled after each chunk. Scored
+    rows are also added to ``monitor`` (a ``DriftMonitor``) when given.
+    """
+    if _is_parquet(output_path):
+        _require_parquet()
+        sink_class = _ParquetSink
+    else:
+        sink_class = _CsvSink
+
+    start = time.perf_counter()
+    n_rows = 0
+    peak_rss = current_rss_bytes()
+    tmp_path = f"{output_path}.tmp"
+    sink = sink_class(tmp_path)
+    try:
+        for features in iter_feature_chunks(input_path, chunk_size):
+            predictions, proba = predict(model, features, threshold)
+            if monitor is not None:
+                monitor.update(features)
+            sink.write(pd.DataFrame({
+                "row_id": np.arange(n_rows, n_rows + len(features), dtype=np.int64),
+                "probability_leave": proba[:, 1],
+                "prediction": predictions.astype(np.int64)
+            }))
+            n_rows += len(features)
+            peak_rss = max(peak_rss, current_rss_bytes())
+    except BaseException:
+        sink.close()
+        os.remove(tmp_path)
+        raise
+    sink.close()
+    os.replace(tmp_path, output_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": n_rows,
+        "seconds": elapsed,
+        "rows_per_second": n_rows / elapsed if elapsed else 0.0,
+        "peak_rss_bytes": peak_rss
+    }
+
+def top_k_stream(model, input_path, k=DEFAULT_TOP_K, filters=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, threshold=DEFAULT_THRESHOLD):
+    """The ``k`` employees most likely to leave, found in one pass over an export
+
+    ``filters`` maps ``FILTER_COLUMNS`` to the values to keep (for example
+    ``{"Department": ["sales"], "salary": ["low"]}``). A min-heap holds the
+    best ``k`` rows seen so far; within each chunk only rows that beat its
+    smallest entry are considered, so memory is one chunk plus ``k`` rows
+    however long the export is. Ties are broken by the earlier ``row_id``.
+    Returns the ranking as a DataFrame and a summary like ``score_stream``'s.
+    """
+    if k < 1:
+        raise ValueError(f"k must be at least 1, got {k}")
+    filters = {column: set(values) for column, values in (filters or {}).items() if values}
+    unknown = [column for column in filters if column not in FILTER_COLUMNS]
+    if unknown:
+        raise ValueError(f"Can only filter by {', '.join(FILTER_COLUMNS)}, not {', '.join(unknown)}")
+    available = read_columns(input_path)
+    extra_columns = [column for column in FILTER_COLUMNS if column in available or column in filters]
+
+    start = time.perf_counter()
+    n_rows = n_matched = 0
+    peak_rss = current_rss_bytes()
+    heap = []  # (probability_leave, -row_id, row values) of the best k rows so far
+    for chunk in iter_feature_chunks(input_path, chunk_size, extra_columns):
+        row_ids = np.arange(n_rows, n_rows + len(chunk), dtype=np.int64)
+        n_rows += len(chunk)
+        if filters:
+            keep = np.logical_and.reduce([chunk[column].isin(values).to_numpy()
+                                          for column, values in filters.items()])
+            chunk, row_ids = chunk[keep], row_ids[keep]
+        n_matched += len(chunk)
+        if not len(chunk):
+            continue
+
+        _, proba = predict(model, chunk[BEST_FEATURES], threshold)
+        proba_leave = proba[:, 1]
+        # Only rows at least as risky as the heap's weakest entry can enter it
+        candidates = np.flatnonzero(proba_leave >= heap[0][0]) if len(heap) == k else np.arange(len(chunk))
+        if len(candidates) > k:
+            kth = np.partition(proba_leave[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[proba_leave[candidates] >= kth]
+        for index, values in zip(candidates, chunk.iloc[candidates].itertuples(index=False)):
+            item = (float(proba_leave[index]), -int(row_ids[index]), tuple(values))
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        peak_rss = max(peak_rss, current_rss_bytes())
+
+    ranked = sorted(heap, reverse=True)
+    ranking = pd.DataFrame([values for _, _, values in ranked], columns=BEST_FEATURES + extra_columns)
+    ranking = ranking.astype(dict.fromkeys(BEST_FEATURES, FEATURE_DTYPE))
+    ranking.insert(0, "row_id", np.array([-row_id for _, row_id, _ in ranked], dtype=np.int64))
+    ranking.insert(1, "probability_leave", np.array([proba for proba, _, _ in ranked], dtype=np.float64))
+    ranking.insert(2, "prediction", (ranking["probability_leave"] > threshold).astype(np.int64))
+
+    elapsed = time.perf_counter() - start
+    return ranking, {
+        "rows": n_rows,
+        "matched_rows": n_matched,
+        "seconds": elapsed,
+        "rows_per_second": n_rows / elapsed if elapsed else 0.0,
+        "peak_rss_bytes": peak_rss
+    }
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large CSV or Parquet export in bounded memory")
+    parser.add_argument("input", help="CSV or Parquet export (.parquet/.pq)")
+    parser.add_argument("output", help="Where to write predictions (CSV or Parquet)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--model", help="Joblib model file (default: local store, then Hugging Face Hub)")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store directory")
+    parser.add_argument("--drift", action="store_true",
+                        help="Also report input drift against the training distribution")
+    parser.add_argument("--top-k", type=int, metavar="K",
+                        help=f"Only write the K employees most likely to leave (e.g. {DEFAULT_TOP_K})")
+    parser.add_argument("--department", action="append", help="With --top-k, only rank this department (repeatable)")
+    parser.add_argument("--salary", action="append", help="With --top-k, only rank this salary band (repeatable)")
+    args = parser.parse_args(argv)
+
+    model = joblib.load(args.model) if args.model else load_model(args.store)[0]
+    if args.top_k is not None:
+        ranking, summary = top_k_stream(
+            model, args.input, args.top_k, {"Department": args.department, "salary": args.salary},
+            args.chunk_size, args.threshold
+        )
+        if _is_parquet(args.output):
+            _require_parquet()
+            ranking.to_parquet(args.output, index=False)
+        else:
+            ranking.to_csv(args.output, index=False)
+        print(json.dumps(summary, indent=2))
+        return
+    monitor = DriftMonitor.from_reference() if args.drift else None
+    summary = score_stream(model, args.input, args.output, args.chunk_size, args.threshold, monitor)
+    if monitor is not None:
+        summary["drift"] = monitor.report()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import CompiledForest, check_parity
+from scoring import BEST_FEATURES, prepare_features
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "HR_comma_sep.csv")
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.read_csv(DATA_PATH)
+    return prepare_features(df), df["left"]
+
+
+@pytest.fixture(scope="module")
+def model(dataset):
+    X, y = dataset
+    return RandomForestClassifier(n_estimators=20, class_weight="balanced", random_state=0).fit(X, y)
+
+
+def test_parity_on_bundled_dataset(model, dataset):
+    X, _ = dataset
+    assert check_parity(model, CompiledForest(model), X) == 0.0
+
+
+def test_parity_on_array_input(model, dataset):
+    X, _ = dataset
+    engine = CompiledForest(model)
+    np.testing.assert_array_equal(engine.predict_proba(X.to_numpy()[:500]), model.predict_proba(X[:500]))
+    np.testing.assert_array_equal(engine.predict(X[:500]), model.predict(X[:500]))
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+def test_rejects_non_finite_input(model, value):
+    row = pd.DataFrame([[0.5, 3, 200, 4, 0.7]], columns=BEST_FEATURES)
+    row.loc[0, "satisfaction_level"] = value
+    with pytest.raises(ValueError, match="NaN or infinity"):
+        CompiledForest(model).predict_proba(row)
+
+
+def test_rejects_wrong_feature_count(model):
+    with pytest.raises(ValueError, match="Expected 5 features"):
+        CompiledForest(model).predict_proba(np.zeros((1, 4)))
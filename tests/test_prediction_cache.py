@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import CompiledForest
+from prediction_cache import PredictionCache
+from scoring import prepare_features
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "HR_comma_sep.csv")
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = pd.read_csv(DATA_PATH)
+    return prepare_features(df), df["left"]
+
+
+def fit(dataset, random_state):
+    X, y = dataset
+    return RandomForestClassifier(n_estimators=10, random_state=random_state).fit(X, y)
+
+
+def test_matches_uncached_predictions(dataset):
+    X, _ = dataset
+    model = fit(dataset, 0)
+    cache = PredictionCache()
+    cache.bind_model(model)
+    rows = X.iloc[:300]
+    np.testing.assert_array_equal(cache.predict_proba(model, rows), model.predict_proba(rows))
+    misses = cache.misses
+    np.testing.assert_array_equal(cache.predict_proba(model, rows), model.predict_proba(rows))
+    assert cache.misses == misses
+
+
+def test_rebinding_a_new_model_clears_entries(dataset):
+    X, _ = dataset
+    old_model, new_model = fit(dataset, 0), fit(dataset, 1)
+    cache = PredictionCache()
+    cache.bind_model(old_model, CompiledForest(old_model))
+    cache.predict_proba(old_model, X.iloc[:100])
+    assert len(cache) > 0
+
+    cache.bind_model(old_model)
+    assert len(cache) > 0
+
+    cache.bind_model(new_model)
+    assert len(cache) == 0 and cache.hits == cache.misses == 0
+    np.testing.assert_array_equal(cache.predict_proba(new_model, X.iloc[:100]), new_model.predict_proba(X.iloc[:100]))
+
+
+def test_unbound_predictor_bypasses_cache(dataset):
+    X, _ = dataset
+    old_model, new_model = fit(dataset, 0), fit(dataset, 1)
+    cache = PredictionCache()
+    cache.bind_model(new_model)
+    np.testing.assert_array_equal(cache.predict_proba(old_model, X.iloc[:100]), old_model.predict_proba(X.iloc[:100]))
+    assert len(cache) == 0
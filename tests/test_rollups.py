@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from rollups import ROLLUP_DIMENSIONS, WorkforceRollup
+from scoring import prepare_features
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "HR_comma_sep.csv")
+
+
+@pytest.fixture(scope="module")
+def workforce():
+    df = pd.read_csv(DATA_PATH)
+    return df.assign(employee_id=np.arange(len(df)) + 1000)
+
+
+@pytest.fixture(scope="module")
+def model(workforce):
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        prepare_features(workforce), workforce["left"]
+    )
+
+
+def assert_same_rollups(incremental, full):
+    for dimension in ROLLUP_DIMENSIONS:
+        pd.testing.assert_frame_equal(
+            incremental.table(dimension).sort_index(), full.table(dimension).sort_index()
+        )
+    assert incremental.totals() == pytest.approx(full.totals())
+
+
+def test_incremental_sync_matches_full_recompute(model, workforce):
+    rollup = WorkforceRollup(model)
+    assert rollup.sync(workforce)["scored"] == len(workforce)
+
+    snapshot = workforce.sample(frac=1.0, random_state=0)
+    snapshot = snapshot.iloc[200:].copy()
+    snapshot.iloc[:50, snapshot.columns.get_loc("satisfaction_level")] = 0.05
+    snapshot.iloc[50:60, snapshot.columns.get_loc("Department")] = "new_department"
+    hires = workforce.iloc[:30].assign(employee_id=np.arange(30) + 100_000)
+    snapshot = pd.concat([snapshot, hires], ignore_index=True)
+
+    result = rollup.sync(snapshot)
+    assert result["removed"] == 200
+    assert result["scored"] <= 50 + 10 + 30
+    full = WorkforceRollup(model)
+    full.sync(snapshot)
+    assert_same_rollups(rollup, full)
+
+
+def test_unchanged_snapshot_scores_nothing(model, workforce):
+    rollup = WorkforceRollup(model)
+    rollup.sync(workforce)
+    result = rollup.sync(workforce.iloc[::-1])
+    assert result["scored"] == result["removed"] == 0
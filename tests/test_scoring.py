@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from scoring import BEST_FEATURES, records_to_array
+
+RECORD = {
+    "satisfaction_level": 0.5,
+    "time_spend_company": 3,
+    "average_monthly_hours": 200,
+    "number_project": 4,
+    "last_evaluation": 0.7
+}
+
+
+def test_records_in_feature_order():
+    record = dict(RECORD, average_montly_hours=RECORD["average_monthly_hours"])
+    del record["average_monthly_hours"]
+    values = records_to_array([RECORD, record])
+    np.testing.assert_array_equal(values, [[RECORD[feature] for feature in BEST_FEATURES]] * 2)
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), "NaN", "-Infinity"])
+def test_rejects_non_finite_values(value):
+    with pytest.raises(ValueError, match="Record 1 contains a non-finite value"):
+        records_to_array([RECORD, dict(RECORD, number_project=value)])
+
+
+def test_rejects_missing_features():
+    record = dict(RECORD)
+    del record["last_evaluation"]
+    with pytest.raises(ValueError, match="Record 0 must contain numeric values"):
+        records_to_array([record])
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from scoring import prepare_features
+from stream_score import top_k_stream
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "HR_comma_sep.csv")
+
+
+@pytest.fixture(scope="module")
+def workforce():
+    return pd.read_csv(DATA_PATH)
+
+
+@pytest.fixture(scope="module")
+def model(workforce):
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        prepare_features(workforce), workforce["left"]
+    )
+
+
+def full_sort(model, workforce, k):
+    """Rank every row at once: highest probability first, earlier row first on ties"""
+    ranked = pd.DataFrame({
+        "row_id": np.arange(len(workforce), dtype=np.int64),
+        "probability_leave": model.predict_proba(prepare_features(workforce))[:, 1]
+    })
+    return ranked.sort_values(["probability_leave", "row_id"], ascending=[False, True]).head(k)
+
+
+@pytest.mark.parametrize("k", [1, 50, 700])
+def test_top_k_matches_full_sort(model, workforce, k):
+    ranking, summary = top_k_stream(model, DATA_PATH, k=k, chunk_size=1_000)
+    expected = full_sort(model, workforce, k)
+    assert summary["rows"] == len(workforce)
+    np.testing.assert_array_equal(ranking["row_id"], expected["row_id"])
+    np.testing.assert_array_equal(ranking["probability_leave"], expected["probability_leave"])
+
+
+def test_filtered_top_k_matches_full_sort(model, workforce):
+    filters = {"Department": ["sales", "technical"], "salary": ["low"]}
+    ranking, summary = top_k_stream(model, DATA_PATH, k=100, filters=filters, chunk_size=1_000)
+    keep = workforce["Department"].isin(filters["Department"]) & workforce["salary"].isin(filters["salary"])
+    expected = full_sort(model, workforce, len(workforce))
+    expected = expected[keep.to_numpy()[expected["row_id"]]].head(100)
+    assert summary["matched_rows"] == keep.sum()
+    np.testing.assert_array_equal(ranking["row_id"], expected["row_id"])
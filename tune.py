@@ -0,0 +1,235 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+
+from model_store import MODEL_STORE_DIR
+from scoring import DATA_PATH
+from train import (
+    DEFAULT_PARAMS,
+    N_FOLDS,
+    RANDOM_STATE,
+    classification_metrics,
+    load_training_data,
+    train
+)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200, 300],
+    "max_depth": [None, 10, 15, 20, 30],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", "log2", 0.6]
+}
+
+# Keep the best 1/ETA of candidates at each rung
+ETA = 3
+
+# Cumulative CV folds evaluated at each rung
+FOLD_SCHEDULE = [1, 3, N_FOLDS]
+
+DEFAULT_CANDIDATES = 27
+DEFAULT_BUDGET_SECONDS = 600
+
+# Rows used to time inference of each fitted candidate
+LATENCY_BATCH_ROWS = 1_000
+
+# Model selection priority (same order used to choose the current model)
+SELECTION_METRICS = ["recall_left", "recall_stayed", "precision_left", "precision_stayed"]
+
+# Candidates within this much of the best score on every metric count as
+# equally accurate; the fastest of them (batch throughput) ranks first
+SELECTION_TOLERANCE = 0.005
+
+# ============================================================================
+# CANDIDATES
+# ============================================================================
+def sample_candidates(n_candidates, seed=RANDOM_STATE):
+    """Draw distinct configurations from the search space"""
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    random.Random(seed).shuffle(grid)
+    return grid[:n_candidates]
+
+
+def rank_candidates(candidates, tolerance=SELECTION_TOLERANCE):
+    """Order candidates best first, preferring the fastest among equally accurate ones
+
+    Each pick keeps the remaining candidates within ``tolerance`` of the best
+    score on each selection metric in turn, then takes the one with the
+    highest batch throughput.
+    """
+    remaining = list(candidates)
+    ranked = []
+    while remaining:
+        contenders = remaining
+        for metric in SELECTION_METRICS:
+            best = max(candidate["cv"][metric] for candidate in contenders)
+            contenders = [candidate for candidate in contenders if candidate["cv"][metric] >= best - tolerance]
+        fastest = max(contenders, key=lambda candidate: candidate["cost"]["batch_rows_per_second"])
+        ranked.append(fastest)
+        remaining = [candidate for candidate in remaining if candidate is not fastest]
+    return ranked
+
+# ============================================================================
+# FOLD EVALUATION
+# ============================================================================
+def evaluate_fold(X, y, train_index, valid_index, params):
+    """Fit one candidate on one fold; measure accuracy, latency and size"""
+    start = time.perf_counter()
+    model = RandomForestClassifier(**{**DEFAULT_PARAMS, **params, "n_jobs": 1})
+    model.fit(X.iloc[train_index], y.iloc[train_index])
+    fit_seconds = time.perf_counter() - start
+
+    X_valid = X.iloc[valid_index]
+    result = classification_metrics(y.iloc[valid_index], model.predict(X_valid))
+
+    latency_batch = X_valid.iloc[:LATENCY_BATCH_ROWS]
+    start = time.perf_counter()
+    model.predict_proba(latency_batch)
+    batch_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    model.predict_proba(latency_batch.iloc[:1])
+    single_seconds = time.perf_counter() - start
+
+    result.update({
+        "fit_seconds": fit_seconds,
+        "batch_rows_per_second": len(latency_batch) / batch_seconds,
+        "single_row_ms": single_seconds * 1000,
+        "model_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        "n_nodes": int(sum(tree.tree_.node_count for tree in model.estimators_))
+    })
+    return result
+
+
+def summarize(candidate):
+    """Average fold results into the candidate's CV and cost figures"""
+    folds = candidate["folds"]
+    accuracy_keys = SELECTION_METRICS + ["balanced_accuracy"]
+    cost_keys = ["fit_seconds", "batch_rows_per_second", "single_row_ms", "model_bytes", "n_nodes"]
+    candidate["cv"] = {key: float(np.mean([fold[key] for fold in folds])) for key in accuracy_keys}
+    candidate["cost"] = {key: float(np.mean([fold[key] for fold in folds])) for key in cost_keys}
+    candidate["n_folds"] = len(folds)
+
+# ============================================================================
+# SUCCESSIVE HALVING
+# ============================================================================
+def successive_halving(n_candidates=DEFAULT_CANDIDATES, budget_seconds=DEFAULT_BUDGET_SECONDS,
+                       n_workers=None, data_path=DATA_PATH):
+    """Search forest hyperparameters, dropping weak candidates after few folds
+
+    Every candidate starts on one CV fold; after each rung only the best
+    1/ETA continue to more folds, up to the full stratified CV. Fold fits run
+    across a process pool. When the wall-clock budget runs out, the workers
+    are terminated and the ranking uses whatever folds have finished.
+    """
+    X_train, _, y_train, _ = load_training_data(data_path)
+    splits = list(StratifiedKFold(
+        n_splits=N_FOLDS, shuffle=True, random_state=RANDOM_STATE
+    ).split(X_train, y_train))
+
+    candidates = [{"params": params, "folds": []} for params in sample_candidates(n_candidates)]
+    alive = candidates
+    deadline = time.monotonic() + budget_seconds
+    rungs = []
+    budget_exhausted = False
+
+    # Leaving the block terminates the workers, so fits still running at the
+    # deadline (whose results would be discarded) do not hold up the search
+    with multiprocessing.Pool(n_workers or os.cpu_count()) as pool:
+        for rung, n_folds in enumerate(FOLD_SCHEDULE):
+            rung_start = time.perf_counter()
+            pending = []
+            for candidate in alive:
+                for fold_index in range(len(candidate["folds"]), n_folds):
+                    train_index, valid_index = splits[fold_index]
+                    result = pool.apply_async(
+                        evaluate_fold, (X_train, y_train, train_index, valid_index, candidate["params"])
+                    )
+                    pending.append((result, candidate))
+
+            for result, candidate in pending:
+                result.wait(max(0.0, deadline - time.monotonic()))
+                if result.ready():
+                    candidate["folds"].append(result.get())
+                else:
+                    budget_exhausted = True
+
+            scored = [candidate for candidate in alive if candidate["folds"]]
+            for candidate in scored:
+                summarize(candidate)
+            scored = rank_candidates(scored)
+            rungs.append({
+                "rung": rung,
+                "folds": n_folds,
+                "candidates": len(alive),
+                "seconds": time.perf_counter() - rung_start
+            })
+
+            if budget_exhausted or rung == len(FOLD_SCHEDULE) - 1:
+                alive = scored
+                break
+            alive = scored[:max(1, math.ceil(len(scored) / ETA))]
+
+    # Candidates evaluated on more folds first, ranked within each fold count
+    finished = [candidate for candidate in candidates if candidate["folds"]]
+    leaderboard = [
+        candidate
+        for n_folds in sorted({candidate["n_folds"] for candidate in finished}, reverse=True)
+        for candidate in rank_candidates([candidate for candidate in finished if candidate["n_folds"] == n_folds])
+    ]
+    for candidate in leaderboard:
+        del candidate["folds"]
+    return {
+        "rungs": rungs,
+        "budget_seconds": budget_seconds,
+        "budget_exhausted": budget_exhausted,
+        "leaderboard": leaderboard
+    }
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Successive-halving search over random forest hyperparameters")
+    parser.add_argument("--data", default=DATA_PATH, help="Training CSV")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES)
+    parser.add_argument("--budget-seconds", type=float, default=DEFAULT_BUDGET_SECONDS)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", default="search_results.json", help="Where to write the leaderboard")
+    parser.add_argument("--publish", action="store_true", help="Train and publish the best candidate")
+    parser.add_argument("--store", default=MODEL_STORE_DIR, help="Model store to publish into")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = successive_halving(args.candidates, args.budget_seconds, args.workers, args.data)
+    results["wall_clock_seconds"] = time.perf_counter() - started
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'recall(L)':>9} {'recall(S)':>9} {'folds':>5} {'rows/s':>10} {'1-row ms':>8} {'MB':>6}  params")
+    for candidate in results["leaderboard"][:10]:
+        cv, cost = candidate["cv"], candidate["cost"]
+        print(f"{cv['recall_left']:>9.4f} {cv['recall_stayed']:>9.4f} {candidate['n_folds']:>5} "
+              f"{cost['batch_rows_per_second']:>10,.0f} {cost['single_row_ms']:>8.2f} "
+              f"{cost['model_bytes'] / 2**20:>6.1f}  {candidate['params']}")
+    print(f"Search finished in {results['wall_clock_seconds']:.1f}s; results written to {args.output}")
+
+    if args.publish and results["leaderboard"]:
+        best = results["leaderboard"][0]["params"]
+        _, manifest, _ = train(best, args.data, args.store)
+        print(f"Published best candidate as version {manifest['version']}")
+
+
+if __name__ == "__main__":
+    main()